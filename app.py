@@ -1,7 +1,8 @@
 import json
+import struct
 from pathlib import Path
 
-from flask import Flask, render_template
+from flask import Flask, render_template, request, send_from_directory
 
 """ 
 using a flask backend to serve a very simple html file containing a canvas that we draw on using
@@ -13,17 +14,68 @@ app = Flask(__name__)
 base_dir = Path(__file__).resolve().parent
 static_dir = base_dir / "static"
 sprite_dir = static_dir / "sprites"
+variant_dir = sprite_dir / "variants"
 audio_dir = static_dir / "audio"
+horizons_dir = base_dir / "horizons_data"
 
 # contains various information and game data about planets
-with Path.open(base_dir / "horizons_data" / "planets.json", encoding='utf-8') as f:
+with Path.open(horizons_dir / "planets.json", encoding='utf-8') as f:
     planets_info = json.load(f)
 
-# create a list of available sprite files
-sprite_list = [sprite_file.stem for sprite_file in sprite_dir.iterdir() if sprite_file.is_file()]
+# create a list of available sprite files, leaving out the downscaled mip levels
+# ("<sprite>_lod<level>.png") which are only requested once a sprite is drawn small enough to use them
+sprite_list = []
+sprite_lods = {}
+for sprite_file in sprite_dir.glob("*.png"):
+    sprite, _, level = sprite_file.stem.rpartition("_lod")
+    if sprite and level.isdigit():
+        sprite_lods.setdefault(sprite, []).append(int(level))
+    else:
+        sprite_list.append(sprite_file.stem)
+for levels in sprite_lods.values():
+    levels.sort()
+
+def png_size(path):
+    """read the width and height of a png from its IHDR chunk, without decoding the image"""
+    with Path.open(path, "rb") as f:
+        header = f.read(24)
+    return struct.unpack(">II", header[16:24])
+
+# sheets with mip levels aren't preloaded in full, the game needs their size to lay out frames before they load
+sprite_sizes = {sprite: png_size(sprite_dir / f"{sprite}.png") for sprite in sprite_lods}
+
+# frame layouts of packed atlases written by tools/make_spritesheets.py, keyed by the name of their sprite
+sprite_manifests = {}
+for manifest_file in sprite_dir.glob("*.json"):
+    with Path.open(manifest_file, encoding='utf-8') as f:
+        sprite_manifests[manifest_file.stem] = json.load(f)
+
+# smaller encodings of the sprites written by tools/make_spritesheets.py, as (size, file name, mimetype) sorted
+# from smallest to largest per sprite. They're build output, without them the originals get served
+variant_types = {".avif": "image/avif", ".webp": "image/webp", ".png": "image/png"}
+sprite_variants = {}
+if variant_dir.exists():
+    for variant_file in variant_dir.iterdir():
+        if variant_file.suffix in variant_types:
+            variant = (variant_file.stat().st_size, variant_file.name, variant_types[variant_file.suffix])
+            sprite_variants.setdefault(variant_file.stem, []).append(variant)
+for variants in sprite_variants.values():
+    variants.sort()
+
+# decoded sizes of the sheets and the memory budget for them, written by tools/texture_budget.py
+texture_budget = {}
+if (static_dir / "texture_budget.json").exists():
+    with Path.open(static_dir / "texture_budget.json", encoding='utf-8') as f:
+        texture_budget = json.load(f)
 
 # create a list of available audio files
-audio_list = [audio_file.name for audio_file in audio_dir.iterdir()]
+audio_list = [audio_file.name for audio_file in audio_dir.glob("*.ogg")]
+
+# lower bitrate versions of the audio files, written by tools/make_audio_tiers.py
+audio_manifest = {}
+if (audio_dir / "tiers" / "manifest.json").exists():
+    with Path.open(audio_dir / "tiers" / "manifest.json", encoding='utf-8') as f:
+        audio_manifest = json.load(f)
 
 with Path.open(static_dir / "lore.txt") as f:
     lore = f.read()
@@ -37,10 +89,37 @@ def index():
         "index.html", 
         planets_info=planets_info, 
         sprite_list=sprite_list, 
+        sprite_manifests=sprite_manifests,
+        sprite_lods=sprite_lods,
+        sprite_sizes=sprite_sizes,
+        texture_budget=texture_budget,
         audio_list=audio_list,
+        audio_manifest=audio_manifest,
         lore=lore,
         credits=credits
     )
 
+@app.route("/sprites/<path:filename>")
+def sprite(filename):
+    """
+    serves the sprites like the static route would, except that the smallest variant the browser accepts gets sent
+    in place of the png, so the game keeps asking for the same names whichever encoding it ends up with. png
+    variants are lossless so any browser can get them, lossy ones only go to browsers that ask for their format
+    """
+    # only mimetypes the browser names explicitly count, everything matches the */* that browsers also send.
+    # q=0 means the browser refuses that mimetype, so those don't count either
+    accepted = {mimetype for mimetype, quality in request.accept_mimetypes if quality > 0}
+    variants = sprite_variants.get(filename.removesuffix(".png"), []) if "/" not in filename else []
+    for _, variant_name, mimetype in variants:
+        if mimetype == "image/png" or mimetype in accepted:
+            response = send_from_directory(variant_dir, variant_name, mimetype=mimetype)
+            break
+    else:
+        response = send_from_directory(sprite_dir, filename)
+
+    # caches have to keep the responses for different Accept headers apart
+    response.vary.add("Accept")
+    return response
+
 if __name__ == "__main__":
     app.run(debug=True)
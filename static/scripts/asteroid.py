@@ -1,7 +1,6 @@
 import math
 import random
 
-from js import document  # type: ignore[attr-defined]
 from common import Position, PlanetData
 from scene_classes import SceneObject
 from window import window, SpriteSheet
@@ -9,14 +8,12 @@ from consolelogger import getLogger
 
 log = getLogger(__name__)
 
-# Canvas dimensions
-canvas = document.getElementById("gameCanvas")
-container = document.getElementById("canvasContainer")
-SCREEN_W, SCREEN_H = container.clientWidth, container.clientHeight
-
 ASTEROID_SHEET = window.sprites["asteroids"]
+# frames of the packed atlas as [x, y, w, h, offset_x, offset_y], see tools/atlas.py. Without it the sheet is
+# treated as a grid of equally sized cells
+ASTEROID_ATLAS = window.get_sprite_manifest("asteroids")
 
-# "magic numbers" obtained via a script in assets/make_spritesheets.py, end of the printout
+# "magic numbers" obtained via a script in tools/make_spritesheets.py, end of the printout
 # Updated to include recycle sprite collision radii (positions 104-119)
 ASTEROID_RADII = [22, 26, 18, 19, 21, 25, 18, 23, 26, 20, 24, 13, 22, 18, 21, 23, 30, 19, 18, 18, 18, 21, 26, 
                   20, 21, 16, 24, 22, 18, 25, 18, 20, 19, 21, 22, 18, 24, 20, 23, 20, 22, 20, 24, 17, 16, 16, 
@@ -61,17 +58,30 @@ class Asteroid(SceneObject):
 
     def _ensure_cell_size(self):
         if not self.cell_size:
-            if self.sheet.width:
+            if ASTEROID_ATLAS:
+                self.cell_size = ASTEROID_ATLAS["cell_size"]
+            elif self.sheet.width:
                 self.cell_size = max(1, int(self.sheet.width // self.grid_cols))
 
     def _src_rect(self):
         self._ensure_cell_size()
+        if ASTEROID_ATLAS:
+            x, y, w, h, _, _ = ASTEROID_ATLAS["frames"][self.sprite_index]
+            return x, y, w, h
         col = self.sprite_index % self.grid_cols
         row = self.sprite_index // self.grid_cols
         x = col * self.cell_size
         y = row * self.cell_size
         return x, y, self.cell_size, self.cell_size
 
+    def _dest_rect(self, size: float):
+        """Where to draw the sprite relative to its center, putting trimmed atlas frames back where they were cut"""
+        if not ASTEROID_ATLAS:
+            return -size / 2, -size / 2, size, size
+        _, _, w, h, offset_x, offset_y = ASTEROID_ATLAS["frames"][self.sprite_index]
+        scale = size / self.cell_size
+        return -size / 2 + offset_x * scale, -size / 2 + offset_y * scale, w * scale, h * scale
+
     def update(self, timestamp: float):
         if self._last_timestamp is None:
             self._last_timestamp = timestamp
@@ -98,16 +108,20 @@ class Asteroid(SceneObject):
 
         x, y, w, h = self._src_rect()
         size = self.size
+        # asteroids start out tiny, so draw from the smallest mip level that still has enough pixels. Lower
+        # quality tiers settle for fewer pixels than that
+        sheet = self.sheet.level_for(size / self.cell_size * window.quality.tier.asteroid_lod_bias)
 
         ctx.save()
         ctx.translate(self.x, self.y)
         ctx.rotate(self.rotation)
 
         # Draw centered
-        ctx.drawImage(self.sheet.image, x, y, w, h, -size / 2, -size / 2, size, size)
+        scale = sheet.scale
+        ctx.drawImage(sheet.image, x * scale, y * scale, w * scale, h * scale, *self._dest_rect(size))
 
         # Debug hit circle
-        if getattr(window, "DEBUG_DRAW_HITBOXES", False):
+        if window.DEBUG_DRAW_HITBOXES:
             ctx.beginPath()
             ctx.strokeStyle = "#FF5555"
             ctx.lineWidth = 2
@@ -115,7 +129,10 @@ class Asteroid(SceneObject):
             ctx.stroke()
         ctx.restore()
 
-    def is_off_screen(self, w=SCREEN_W, h=SCREEN_H, margin=50) -> bool:
+    def is_off_screen(self, w=None, h=None, margin=50) -> bool:
+        viewport = window.viewport
+        w = viewport.width if w is None else w
+        h = viewport.height if h is None else h
         return self.x < -margin or self.x > w + margin or self.y < -margin or self.y > h + margin
 
     def get_hit_circle(self):
@@ -166,15 +183,16 @@ class AsteroidAttack:
             x = random.uniform(space_start_x, self.w)
             y = random.uniform(0, self.h)
 
-        if x < (SCREEN_W / 2):
+        center = window.viewport.center
+        if x < center.x:
             velocity_x = random.uniform(-15, -5)
-            if y < (SCREEN_H / 2):
+            if y < center.y:
                 velocity_y = random.uniform(-15, -5)
             else:
                 velocity_y = random.uniform(5, 15)
         else:
             velocity_x = random.uniform(5, 15)
-            if y < (SCREEN_H / 2):
+            if y < center.y:
                 velocity_y = random.uniform(-15, -5)
             else:
                 velocity_y = random.uniform(5, 15)
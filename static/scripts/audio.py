@@ -2,31 +2,90 @@ import random
 from typing import Union
 from functools import partial
 
-from js import Audio  # type: ignore[attr-defined]
+from js import Audio, localStorage, navigator  # type: ignore[attr-defined]
+
+# tiers for music and for sound effects by the effective connection type the browser reports, "full" is the
+# original file. Music is the bulk of the download so it drops to the low tier first
+CONNECTION_TIERS = {
+    "slow-2g": ("low", "low"),
+    "2g": ("low", "low"),
+    "3g": ("low", "medium"),
+    "4g": ("full", "full"),
+}
+# localStorage keys for tiers chosen by the player, which win over the connection based choice
+MUSIC_TIER_KEY = "audio_music_tier"
+SFX_TIER_KEY = "audio_sfx_tier"
 
 
 class AudioHandler:
-    def __init__(self, static_url: str) -> None:
+    def __init__(self, static_url: str, manifest: dict | None = None) -> None:
         self.static_url = static_url
         self.volume: int = 1.0
+        # bitrate tiers of each file from tools/make_audio_tiers.py, without them everything plays at full quality
+        self.tracks: dict = (manifest or {}).get("tracks", {})
+        self.music_tier, self.sfx_tier = self._choose_tiers()
+
+        # sounds that stay around to be played again, so they can be swapped to another tier
+        self._persistent: dict[str, Audio] = {}
+        self.text_sound = self._load_persistent("text.ogg")
+        self.scan_sound = self._load_persistent("scan.ogg")
+        self.explosion_sound = self._load_persistent("explosion.ogg")
 
-        self.text_sound = self.load_audio("text.ogg")
-        self.scan_sound = self.load_audio("scan.ogg")
-        self.explosion_sound = self.load_audio("explosion.ogg")
+        self.music_main = self._load_persistent("music_main.ogg")
+        self.music_thematic = self._load_persistent("music_thematic.ogg")
+        self.music_death = self._load_persistent("death.ogg")
 
-        self.music_main = self.load_audio("music_main.ogg")
-        self.music_thematic = self.load_audio("music_thematic.ogg")
-        self.music_death = self.load_audio("death.ogg")
+        # fetched ahead of time so the browser has them cached once play_bang creates new instances of them
+        for bang in ("bang1.ogg", "bang2.ogg", "bang3.ogg"):
+            self._load_persistent(bang)
 
         self.active_music = None
 
+    def _choose_tiers(self) -> tuple[str, str]:
+        """ pick the music and sound effect tiers from the player's setting, else from their connection """
+        music_tier, sfx_tier = "full", "full"
+        connection = getattr(navigator, "connection", None)
+        if connection is not None:
+            if getattr(connection, "saveData", False):
+                music_tier, sfx_tier = "low", "low"
+            else:
+                music_tier, sfx_tier = CONNECTION_TIERS.get(getattr(connection, "effectiveType", ""), ("full", "full"))
+        return localStorage.getItem(MUSIC_TIER_KEY) or music_tier, localStorage.getItem(SFX_TIER_KEY) or sfx_tier
+
+    def set_tiers(self, music_tier: str | None = None, sfx_tier: str | None = None) -> None:
+        """
+        choose the quality of music and sound effects ("low", "medium" or "full"), remembered across visits.
+        Sounds already loaded switch over as well, so a playing track restarts from the beginning
+        """
+        if music_tier:
+            self.music_tier = music_tier
+            localStorage.setItem(MUSIC_TIER_KEY, music_tier)
+        if sfx_tier:
+            self.sfx_tier = sfx_tier
+            localStorage.setItem(SFX_TIER_KEY, sfx_tier)
+        for audio_name, audio in self._persistent.items():
+            audio.src = self._audio_url(audio_name)
+
+    def _audio_url(self, audio_name: str) -> str:
+        track = self.tracks.get(audio_name)
+        if track:
+            tier = self.music_tier if track["kind"] == "music" else self.sfx_tier
+            if tier in track["tiers"]:
+                audio_name = track["tiers"][tier]["file"]
+        return f"{self.static_url}audio/{audio_name}"
+
+    def _load_persistent(self, audio_name: str) -> Audio:
+        audio = self._persistent[audio_name] = self.load_audio(audio_name)
+        return audio
+
     def set_volume(self, volume: float) -> None:
         """ set volume to somewhere between 0.0 and 1.0 if a valid value is given """
         if 0.0 <= volume <= 1.0:
             self.volume = volume
 
     def load_audio(self, audio_name: str) -> Audio:
-        return Audio.new(f"{self.static_url}audio/{audio_name}")
+        """ load a sound file from static/audio/ in the tier chosen for its kind """
+        return Audio.new(self._audio_url(audio_name))
 
     def play_sound(self, audio_name: Union[str, "Audio"], volume=1.0) -> None:
         """
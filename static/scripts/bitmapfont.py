@@ -0,0 +1,206 @@
+"""Text drawn from the pre-baked bitmap font atlas instead of with fillText.
+
+fillText shapes and rasterizes its text on every call, for every line and every frame. The font atlas built by
+tools/make_spritesheets.py already holds every glyph at the sizes we use, so drawing a line comes down to one drawImage
+per glyph, out of a copy of the atlas tinted in the text color. Glyph positions of each line are cached, so a line
+that was drawn before costs no more python work than looping over its blits.
+
+Text at a size the atlas doesn't have, with characters it doesn't have, or drawn before the atlas image loaded falls
+back to fillText with the font the game used before the atlas, so it always shows up.
+
+Usage
+-------
+from bitmapfont import draw_text, measure_text
+draw_text(ctx, "Hello", x, y, 14, "#00ff00")
+width = measure_text(ctx, "Hello", 14)
+"""
+
+from functools import cache
+from typing import Any
+
+from common import CanvasRenderingContext2D
+from js import document  # type: ignore[attr-defined]
+from window import window
+
+FONT_SHEET = "font"
+FALLBACK_FAMILY = "'Courier New', monospace"
+# sizes that are this close to a baked size are drawn at the baked size
+SIZE_TOLERANCE = 0.5
+# layouts cached per font size before the cache starts over, plenty for every line of every screen
+MAX_CACHED_LAYOUTS = 512
+# tinted copies of the atlas kept before that cache starts over, the game only uses a handful of text colors
+MAX_TINTS = 16
+
+# a blit as (source x, source y, width, height, x offset, y offset), offsets from the pen position on the baseline
+Blit = tuple[float, float, float, float, float, float]
+
+
+@cache
+def css_font(size: float, family: str, *, bold: bool = False) -> str:
+    """Format a canvas font string, cached since the same few fonts get set every frame."""
+    return f"{'bold ' if bold else ''}{size}px {family}"
+
+
+class BitmapFont:
+    """The glyphs of one size of the font atlas."""
+
+    def __init__(self, size: int, metrics: dict, frames: list[list[int]], chars: str, margin: int) -> None:
+        self.size = size
+        # it's a monospace font, every character moves the pen by the same amount
+        self.advance: float = metrics["advance"]
+        self.ascent: int = metrics["ascent"]
+        self.descent: int = metrics["descent"]
+
+        first = metrics["first"]
+        self.glyphs: dict[str, Blit | None] = {}
+        for i, char in enumerate(chars):
+            x, y, width, height, offset_x, offset_y = frames[first + i]
+            # frame offsets are relative to the glyph cell, which has the baseline at the ascent below its margin
+            blit = (x, y, width, height, offset_x - margin, offset_y - margin - self.ascent)
+            self.glyphs[char] = None if char.isspace() else blit
+        self._layouts: dict[str, list[Blit] | None] = {}
+
+    def measure(self, text: str) -> float:
+        """Width of a line of text."""
+        return len(text) * self.advance
+
+    def layout(self, text: str) -> list[Blit] | None:
+        """Get the blits of a line relative to its start on the baseline, or None if the font lacks some character."""
+        layouts = self._layouts
+        if text in layouts:
+            return layouts[text]
+        if len(layouts) >= MAX_CACHED_LAYOUTS:
+            layouts.clear()
+
+        blits = []
+        glyphs = self.glyphs
+        pen = 0.0
+        for char in text:
+            if char not in glyphs:
+                blits = None
+                break
+            glyph = glyphs[char]
+            if glyph is not None:
+                x, y, width, height, offset_x, offset_y = glyph
+                blits.append((x, y, width, height, pen + offset_x, offset_y))
+            pen += self.advance
+        layouts[text] = blits
+        return blits
+
+    def draw(self, ctx: CanvasRenderingContext2D, text: str, x: float, y: float, image: Any) -> bool:
+        """Blit a line with its start on the baseline at x, y. Returns False if the font can't draw the text."""
+        blits = self.layout(text)
+        if blits is None:
+            return False
+        # whole pixels keep the glyphs as crisp as they were baked
+        x, y = round(x), round(y)
+        draw_image = ctx.drawImage
+        for source_x, source_y, width, height, offset_x, offset_y in blits:
+            draw_image(image, source_x, source_y, width, height, x + offset_x, y + offset_y, width, height)
+        return True
+
+
+class FontAtlas:
+    """The font atlas image with its manifest, and tinted copies of it to draw colored text from."""
+
+    def __init__(self, image: Any, manifest: dict) -> None:
+        self.image = image
+        self.fonts = {
+            int(size): BitmapFont(int(size), metrics, manifest["frames"], manifest["chars"], manifest["margin"])
+            for size, metrics in manifest["sizes"].items()
+        }
+        self._tinted: dict[str, Any] = {}
+        self._loaded = False
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the atlas image finished loading."""
+        # once it has loaded it stays loaded, so stop asking the image every time text gets drawn
+        if not self._loaded:
+            self._loaded = bool(self.image.complete and self.image.naturalWidth)
+        return self._loaded
+
+    def font(self, size: float) -> BitmapFont | None:
+        """Get the baked font closest to the size, or None if none is close enough."""
+        font = self.fonts.get(round(size))
+        if font is None or abs(font.size - size) > SIZE_TOLERANCE:
+            return None
+        return font
+
+    def tinted(self, color: str) -> Any:
+        """Get a canvas with the atlas glyphs in the given color, painted the first time a color is asked for."""
+        canvas = self._tinted.get(color)
+        if canvas is None:
+            if len(self._tinted) >= MAX_TINTS:
+                self._tinted.clear()
+            canvas = document.createElement("canvas")
+            canvas.width = self.image.naturalWidth
+            canvas.height = self.image.naturalHeight
+            # this runs once per color, so it talks to the offscreen context directly rather than through a DrawBuffer
+            tint_ctx = canvas.getContext("2d")
+            tint_ctx.drawImage(self.image, 0, 0)
+            # keep the alpha of the glyphs but replace their color
+            tint_ctx.globalCompositeOperation = "source-in"
+            tint_ctx.fillStyle = color
+            tint_ctx.fillRect(0, 0, canvas.width, canvas.height)
+            self._tinted[color] = canvas
+        return canvas
+
+
+_atlas: FontAtlas | None = None
+
+
+def get_font_atlas() -> FontAtlas | None:
+    """Get the font atlas, or None if it wasn't built or hasn't loaded yet."""
+    global _atlas  # noqa: PLW0603
+    if _atlas is None:
+        manifest = window.get_sprite_manifest(FONT_SHEET)
+        if manifest is None:
+            return None
+        _atlas = FontAtlas(window.get_sprite(FONT_SHEET).image, manifest)
+    return _atlas if _atlas.is_loaded else None
+
+
+def get_font(size: float, *, bold: bool = False) -> BitmapFont | None:
+    """Get the bitmap font to draw text of a size with, or None if it has to go through fillText."""
+    # only the regular weight is baked
+    atlas = None if bold else get_font_atlas()
+    return atlas.font(size) if atlas else None
+
+
+def measure_text(ctx: CanvasRenderingContext2D, text: str, size: float, *, bold: bool = False) -> float:
+    """Width of a line of text as draw_text would draw it."""
+    font = get_font(size, bold=bold)
+    if font is not None and font.layout(text) is not None:
+        return font.measure(text)
+    ctx.font = css_font(size, FALLBACK_FAMILY, bold=bold)
+    return ctx.measureText(text).width
+
+
+def draw_text(  # noqa: PLR0913
+    ctx: CanvasRenderingContext2D,
+    text: str,
+    x: float,
+    y: float,
+    size: float,
+    color: str,
+    *,
+    align: str = "left",
+    bold: bool = False,
+) -> None:
+    """Draw a line of text with its baseline at y, starting, centered or ending at x depending on align."""
+    font = get_font(size, bold=bold)
+    if font is not None:
+        if align != "left":
+            x -= font.measure(text) / (2 if align == "center" else 1)
+        if font.draw(ctx, text, x, y, get_font_atlas().tinted(color)):
+            return
+        if align != "left":
+            x += font.measure(text) / (2 if align == "center" else 1)
+
+    ctx.save()
+    ctx.font = css_font(size, FALLBACK_FAMILY, bold=bold)
+    ctx.fillStyle = color
+    ctx.textAlign = align
+    ctx.fillText(text, x, y)
+    ctx.restore()
@@ -95,6 +95,45 @@ class Position:
         return ((self.x - other_pos.x) ** 2 + (self.y - other_pos.y) ** 2) ** 0.5
 
 
+@dataclass
+class Viewport:
+    """Size of the canvas, kept on the python side so reading it doesn't go through the JS bridge.
+
+    Only the resize handler in game.py updates it, everything else reads window.viewport.
+
+    width and height are in CSS pixels, which is what all the game code draws in and what mouse coordinates are
+    in. The canvas backing store is render_scale times that size, the game loop sets a transform to make up for the
+    difference and the browser stretches the result back over the CSS size.
+    """
+
+    width: int
+    height: int
+    render_scale: float = 1.0
+
+    def resize(self, width: int, height: int, render_scale: float = 1.0) -> None:
+        self.width = width
+        self.height = height
+        self.render_scale = render_scale
+
+    @property
+    def pixel_width(self) -> int:
+        """Width of the canvas backing store."""
+        return max(1, round(self.width * self.render_scale))
+
+    @property
+    def pixel_height(self) -> int:
+        """Height of the canvas backing store."""
+        return max(1, round(self.height * self.render_scale))
+
+    @property
+    def center(self) -> Position:
+        return Position(self.width / 2, self.height / 2)
+
+    @property
+    def min_side(self) -> int:
+        return min(self.width, self.height)
+
+
 @dataclass
 class PlanetState:
     """State for planet"""
@@ -112,19 +151,37 @@ class PlanetState:
 class SpriteSheet:
     """Wrapper for individual sprites with enhanced functionality."""
 
-    def __init__(self, key: str, image: "HTMLImageElement"):
+    def __init__(  # noqa: PLR0913
+        self,
+        key: str,
+        image: "HTMLImageElement",
+        levels: list[dict] | None = None,
+        scale: float = 1.0,
+        *,
+        url: str | None = None,
+        size: tuple[int, int] | None = None,
+    ):
         self.key = key.lower()
         self.image = image
+        # downscaled mip levels from biggest to smallest, as set up in index.html
+        self.levels = levels or []
+        # size of this sheet relative to the full resolution one
+        self.scale = scale
+        # sheets with mip levels aren't preloaded, they're loaded from url once they're needed. Their size is known
+        # up front so frames can be laid out before then
+        self.url = url
+        self._size = size
+        self._load_requested = False
 
     @property
     def height(self):
         """Height of the sprite image."""
-        return self.image.height
+        return self._size[1] if self._size else self.image.height
 
     @property
     def width(self):
         """Width of the sprite image."""
-        return self.image.width
+        return self._size[0] if self._size else self.image.width
 
     @property
     def frame_size(self):
@@ -133,12 +190,12 @@ class SpriteSheet:
 
     @property
     def is_loaded(self):
-        return self.height > 0 and self.width > 0
+        return self.image.naturalWidth > 0 and self.image.naturalHeight > 0
 
     @property
     def num_frames(self):
         """Number of frames in the spritesheet."""
-        if not self.is_loaded:
+        if not self.height:
             return 1
         return self.width // self.frame_size
 
@@ -150,6 +207,52 @@ class SpriteSheet:
         x = frame_index * self.frame_size
         return Position(x, 0)
 
+    def level_for(self, draw_scale: float) -> SpriteSheet:
+        """Get the smallest mip level with at least draw_scale times the full resolution.
+
+        A level, or the full resolution sheet, starts loading the first time it is picked. Until it's loaded the
+        closest bigger one that is loaded gets used instead, or failing that the closest smaller one.
+        """
+        target = None
+        for i, level in enumerate(self.levels):
+            if level["scale"] < draw_scale:
+                break
+            target = i
+
+        if target is None:
+            self.load()
+            # None stands for the full resolution sheet
+            candidates = [None, *self.levels]
+        else:
+            if not self.levels[target]["image"].src:
+                self.levels[target]["image"].src = self.levels[target]["url"]
+            candidates = [*reversed(self.levels[: target + 1]), None, *self.levels[target + 1 :]]
+
+        for level in candidates:
+            if level is None:
+                if self.is_loaded:
+                    return self
+                continue
+            if level["image"].complete and level["image"].naturalWidth:
+                return self._level_sheet(level)
+        if self.image.src or not self.levels:
+            return self
+        # nothing is loaded yet. An image without a src can't be drawn at all, while the smallest level is
+        # preloaded, so it's at least on its way
+        return self._level_sheet(self.levels[-1])
+
+    def _level_sheet(self, level: dict) -> SpriteSheet:
+        if level["sheet"] is None:
+            level["sheet"] = SpriteSheet(self.key, level["image"], scale=level["scale"])
+        return level["sheet"]
+
+    def load(self) -> None:
+        """Start loading the full resolution sheet, if it isn't preloaded and wasn't asked for before."""
+        if self.url and not self._load_requested:
+            self._load_requested = True
+            if not self.image.src:
+                self.image.src = self.url
+
     # Delegate other attributes to the underlying image
     def __getattr__(self, name):
         return getattr(self.image, name)
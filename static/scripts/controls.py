@@ -4,6 +4,7 @@ from time import time
 from common import Position
 from consolelogger import getLogger
 from pyodide.ffi import create_proxy  # type: ignore[attr-defined]
+from window import window
 
 log = getLogger(__name__)
 
@@ -25,7 +26,8 @@ class GameControls:
         the strings for mouse buttons are given by GameControls.MOUSE_LEFT, etc.
     -   controls.mouse gives access to all the coordinates of the last registered mouse event of each kind as the
         tuples controls.mouse.mousedown, controls.mouse.mouseup, controls.mouse.click, controls.mouse.move
-    -   use controls.mouse.move for best current coordinates of the mouse
+    -   use controls.mouse.move for best current coordinates of the mouse, it's updated once per frame by
+        controls.update() in the game loop rather than on every pointer event
     -   additionally, controls.click is a boolean representing if a click just occurred. It is set to False at the
         end of each game loop if nothing makes use of the click event
     -   use enable_logging=False if spam of mouse/key events in browser console gets annoying
@@ -39,6 +41,7 @@ class GameControls:
     mouse_button_map = {0: MOUSE_LEFT, 1: MOUSE_MIDDLE, 2: MOUSE_RIGHT}
 
     def __init__(self, canvas, enable_logging=False):
+        self._canvas = canvas
         # keep track of what keys \ mouse buttons are currently pressed in this variable
         self.pressed = set()
         # keep track of the last coordinates used by all mouse events
@@ -50,28 +53,64 @@ class GameControls:
         self._logging = enable_logging
         self._last_mousemove_log = 0
 
+        # the canvas position on the page, getBoundingClientRect can force a layout so it's only read when the
+        # page layout changes instead of for every mouse event
+        self._canvas_left = 0.0
+        self._canvas_top = 0.0
+        # client coordinates of the latest pointer move that update() hasn't applied yet
+        self._pending_move: tuple[float, float] | None = None
+
         on_canvas_mousedown_proxy = create_proxy(self.on_canvas_mousedown)
         on_canvas_mouseup_proxy = create_proxy(self.on_canvas_mouseup)
         on_canvas_click_proxy = create_proxy(self.on_canvas_click)
-        on_canvas_mousemove_proxy = create_proxy(self.on_canvas_mousemove)
+        on_canvas_pointermove_proxy = create_proxy(self.on_canvas_pointermove)
         on_keydown_proxy = create_proxy(self.on_keydown)
         on_keyup_proxy = create_proxy(self.on_keyup)
+        on_layout_change_proxy = create_proxy(self.refresh_canvas_rect)
 
         canvas.addEventListener("mousedown", on_canvas_mousedown_proxy)
         canvas.addEventListener("mouseup", on_canvas_mouseup_proxy)
         canvas.addEventListener("click", on_canvas_click_proxy)
-        canvas.addEventListener("mousemove", on_canvas_mousemove_proxy)
+        # pointermove rather than mousemove, browsers coalesce pointer moves to at most one event per frame
+        canvas.addEventListener("pointermove", on_canvas_pointermove_proxy)
         canvas.addEventListener("keydown", on_keydown_proxy)
         canvas.addEventListener("keyup", on_keyup_proxy)
+        window.addEventListener("resize", on_layout_change_proxy)
+        # capture scrolling of any element, not just the page, since any of them can move the canvas
+        window.addEventListener("scroll", on_layout_change_proxy, True)
+        self.refresh_canvas_rect()
+
+    def refresh_canvas_rect(self, event=None):
+        canvas_rect = self._canvas.getBoundingClientRect()
+        self._canvas_left = canvas_rect.left
+        self._canvas_top = canvas_rect.top
 
     # helper method so we don't need to copy and paste this to every mouse event
     def get_mouse_event_coords(self, event) -> Position:
-        canvas_rect = event.target.getBoundingClientRect()
-        return Position(event.clientX - canvas_rect.left, event.clientY - canvas_rect.top)
+        return Position(event.clientX - self._canvas_left, event.clientY - self._canvas_top)
+
+    def _move_to(self, pos: Position) -> None:
+        """Set the mouse position from a button event, replacing any pointer move update() hasn't applied yet."""
+        # the pending move is older than this event, applying it later would move the mouse back
+        self._pending_move = None
+        self.mouse.move = pos
+
+    def update(self):
+        """Apply the latest pointer move, called once per frame before rendering."""
+        if self._pending_move is None:
+            return
+        x, y = self._pending_move
+        self._pending_move = None
+        pos = self.mouse.move = Position(x - self._canvas_left, y - self._canvas_top)
+
+        # throttle number of mousemove logs to prevent spamming the debug log
+        if self._logging and (now := time()) - self._last_mousemove_log > 2.5:
+            log.debug("mousemove %s, %s", pos.x, pos.y)
+            self._last_mousemove_log = now
 
     def on_canvas_mousedown(self, event):
         pos = self.get_mouse_event_coords(event)
-        self.mouse.move = pos
+        self._move_to(pos)
         self.mouse.mousedown = pos
 
         if event.button in self.mouse_button_map:
@@ -83,7 +122,7 @@ class GameControls:
 
     def on_canvas_mouseup(self, event):
         pos = self.get_mouse_event_coords(event)
-        self.mouse.move = pos
+        self._move_to(pos)
         self.mouse.mouseup = pos
 
         if event.button in self.mouse_button_map:
@@ -96,21 +135,16 @@ class GameControls:
 
     def on_canvas_click(self, event):
         pos = self.get_mouse_event_coords(event)
-        self.mouse.move = pos
+        self._move_to(pos)
         self.mouse.click = pos
 
         self.click = True
         if self._logging:
             log.debug("click %s, %s", pos.x, pos.y)
 
-    def on_canvas_mousemove(self, event):
-        pos = self.get_mouse_event_coords(event)
-        self.mouse.move = pos
-
-        # throttle number of mousemove logs to prevent spamming the debug log
-        if self._logging and (now := time()) - self._last_mousemove_log > 2.5:
-            log.debug("mousemove %s, %s", pos.x, pos.y)
-            self._last_mousemove_log = now
+    def on_canvas_pointermove(self, event):
+        # only the latest position matters, so this just stores it for update() to convert
+        self._pending_move = (event.clientX, event.clientY)
 
         # TODO: check event.buttons here (tells which buttons are pressed during mouse move) if mouse is pressed
         # down on canvas, then moved off, and button is unpressed while off the canvas, mouse buttons may be
@@ -116,6 +116,10 @@ class DebrisSystem(SceneObject):
             debris.rotation = math.atan2(-debris.y + new_debris_center.y, -debris.x + new_debris_center.x)
 
         self.debris_list.extend(new_debris)
+        # drop the oldest pieces beyond what the quality tier allows
+        max_debris = window.quality.tier.max_debris
+        if max_debris is not None and len(self.debris_list) > max_debris:
+            del self.debris_list[: len(self.debris_list) - max_debris]
 
     def render(self, ctx, timestamp) -> None:
         """Render every debris"""
@@ -0,0 +1,50 @@
+// Executor for the draw commands recorded by DrawBuffer in drawbuffer.py.
+//
+// Each command in the buffer is [opcode, argument count, ref mask, arguments...]. An opcode of -1 sets a property
+// on the context, anything else calls RECORDED_METHODS[opcode]. Arguments whose bit is set in the ref mask are
+// indices into the refs array, for strings, images and gradients that can't be stored as a number.
+
+const SET_PROPERTY = -1;
+
+window.createDrawBufferExecutor = function (methodNames) {
+    const names = Array.from(methodNames);
+    const args = new Array(16);
+    // the methods are resolved once per context rather than looked up by name for every command
+    let methodsCtx = null;
+    let methods = null;
+
+    return function execute(ctx, ops, length, refs) {
+        if (ctx !== methodsCtx) {
+            methods = names.map((name) => ctx[name]);
+            methodsCtx = ctx;
+        }
+        let i = 0;
+        while (i < length) {
+            const opcode = ops[i];
+            const argc = ops[i + 1];
+            const mask = ops[i + 2];
+            i += 3;
+            for (let a = 0; a < argc; a++, i++) {
+                args[a] = mask & (1 << a) ? refs[ops[i]] : ops[i];
+            }
+
+            if (opcode === SET_PROPERTY) {
+                ctx[args[0]] = args[1];
+                continue;
+            }
+            const method = methods[opcode];
+            switch (argc) {
+                case 0: method.call(ctx); break;
+                case 1: method.call(ctx, args[0]); break;
+                case 2: method.call(ctx, args[0], args[1]); break;
+                case 3: method.call(ctx, args[0], args[1], args[2]); break;
+                case 4: method.call(ctx, args[0], args[1], args[2], args[3]); break;
+                case 5: method.call(ctx, args[0], args[1], args[2], args[3], args[4]); break;
+                case 6: method.call(ctx, args[0], args[1], args[2], args[3], args[4], args[5]); break;
+                default: method.apply(ctx, args.slice(0, argc));
+            }
+        }
+        // don't keep images or gradients alive until the next frame overwrites them
+        args.fill(undefined);
+    };
+};
@@ -0,0 +1,226 @@
+"""Recording canvas context that batches draw calls into a single call to javascript per frame.
+
+Every ctx.something(...) call or property assignment on a real CanvasRenderingContext2D crosses from Pyodide into
+javascript, and with hundreds of asteroids, debris and stars those crossings add up to most of the frame time.
+DrawBuffer looks like a context to the render functions, but it only appends each command to a buffer of floats:
+
+    [opcode, argument count, ref mask, arguments...]
+
+Numeric arguments go in the buffer as they are, anything else (strings, images, gradients) goes in a separate refs
+list and the buffer holds its index instead, marked by its bit in the ref mask. flush() copies the whole buffer into
+a Float64Array and hands it to the executor in drawbuffer.js, which replays it against the real context in one go.
+
+It also keeps a shadow copy of the context properties it has set, through save() and restore() and across flushes,
+so assigning a property the value it already has records nothing at all. Setting the same fillStyle or lineWidth for
+every asteroid, or the image smoothing flags every frame, then only costs a dict lookup.
+
+Methods that aren't recorded, like measureText, are looked up on the real context once and cached as plain python
+attributes of the buffer, since every lookup through a JsProxy builds a new bound method proxy.
+
+Proxies: nothing in here hands a python object to javascript except the buffer itself through window.ctx. Refs and
+list arguments are converted with create_pyproxies=False, so passing something that would need a PyProxy (and leak
+it, since nothing would destroy it) raises a ConversionError instead. The executor drops its references to the refs
+once it's done, so images and gradients don't stay alive for longer than the frame that drew them.
+
+Usage
+-------
+ctx = DrawBuffer(canvas.getContext("2d"))
+scene.render(ctx, timestamp)  # unchanged render code
+ctx.flush()                   # once per frame
+"""
+
+from array import array
+from collections.abc import Callable
+from typing import Any
+
+from common import CanvasRenderingContext2D
+from js import Float64Array  # type: ignore[attr-defined]
+from pyodide.ffi import to_js  # type: ignore[attr-defined]
+from window import window
+
+# context methods that get recorded, their index is their opcode. Anything else is called on the real context
+# right away, after flushing what was recorded so far so it runs in the right order
+RECORDED_METHODS = (
+    "save",
+    "restore",
+    "beginPath",
+    "closePath",
+    "fill",
+    "stroke",
+    "clip",
+    "translate",
+    "rotate",
+    "scale",
+    "setTransform",
+    "resetTransform",
+    "moveTo",
+    "lineTo",
+    "arc",
+    "arcTo",
+    "ellipse",
+    "bezierCurveTo",
+    "quadraticCurveTo",
+    "rect",
+    "fillRect",
+    "strokeRect",
+    "clearRect",
+    "drawImage",
+    "fillText",
+    "strokeText",
+)
+# opcode of a property assignment, with the property name and the value as its arguments
+SET_PROPERTY = -1
+SAVE, RESTORE = RECORDED_METHODS.index("save"), RECORDED_METHODS.index("restore")
+
+NUMBER_TYPES = (int, float, bool)
+
+
+class DrawBuffer:
+    """Drop-in stand-in for a CanvasRenderingContext2D that records draw commands until flush() is called.
+
+    Assigned property values are shadowed on the python side, including what save() and restore() do to them, so
+    writes that wouldn't change anything are skipped and reading ctx.fillStyle back doesn't need a flush. Reading
+    anything else, or calling a method that returns something like measureText or createLinearGradient, flushes
+    first and then goes to the real context.
+
+    The shadow state assumes nothing else changes the real context, call invalidate_state() after something does,
+    like resizing the canvas which resets every property.
+    """
+
+    def __init__(self, ctx: CanvasRenderingContext2D) -> None:
+        self._ctx = ctx
+        self._ops = array("d")
+        self._refs: list[Any] = []
+        # strings repeat a lot within a frame (colors, fonts), so they share one ref each. So do objects, like the
+        # image every glyph of a line of text is drawn from, by identity since the refs keep them alive until flushed
+        self._string_refs: dict[str, int] = {}
+        self._object_refs: dict[int, int] = {}
+        self._state: dict[str, Any] = {}
+        self._saved_states: list[dict[str, Any]] = []
+        self._property_writes = 0
+        self._elided_writes = 0
+        self._js_ops = Float64Array.new(4096)
+        self._execute = window.createDrawBufferExecutor(to_js(RECORDED_METHODS))
+
+    @property
+    def real_context(self) -> CanvasRenderingContext2D:
+        """The wrapped context, for code that needs to talk to it directly. Flush before using it."""
+        return self._ctx
+
+    @property
+    def property_writes(self) -> int:
+        """Number of property assignments that were recorded."""
+        return self._property_writes
+
+    @property
+    def elided_writes(self) -> int:
+        """Number of property assignments that were skipped because the property already had that value."""
+        return self._elided_writes
+
+    def invalidate_state(self) -> None:
+        """Forget the shadowed properties, for when the real context was changed behind this buffer's back."""
+        self._state.clear()
+        self._saved_states.clear()
+
+    def _ref(self, value: Any) -> int:
+        if isinstance(value, str):
+            index = self._string_refs.get(value)
+            if index is None:
+                index = self._string_refs[value] = len(self._refs)
+                self._refs.append(value)
+            return index
+        index = self._object_refs.get(id(value))
+        if index is None:
+            index = self._object_refs[id(value)] = len(self._refs)
+            self._refs.append(value)
+        return index
+
+    def _record(self, opcode: int, args: tuple) -> None:
+        ops = self._ops
+        mask = 0
+        values = []
+        for i, arg in enumerate(args):
+            if isinstance(arg, NUMBER_TYPES):
+                values.append(arg)
+            else:
+                mask |= 1 << i
+                values.append(self._ref(arg))
+        ops.append(opcode)
+        ops.append(len(args))
+        ops.append(mask)
+        ops.extend(values)
+
+    def save(self) -> None:
+        """Record a save, remembering the shadowed properties to go back to on restore."""
+        self._saved_states.append(self._state.copy())
+        self._record(SAVE, ())
+
+    def restore(self) -> None:
+        """Record a restore, going back to the shadowed properties from the matching save."""
+        # a restore without a matching save leaves the properties unknown until they're set again
+        self._state = self._saved_states.pop() if self._saved_states else {}
+        self._record(RESTORE, ())
+
+    def flush(self) -> None:
+        """Replay everything recorded so far against the real context and clear the buffer."""
+        length = len(self._ops)
+        if length:
+            if self._js_ops.length < length:
+                self._js_ops = Float64Array.new(max(length, self._js_ops.length * 2))
+            self._js_ops.subarray(0, length).assign(self._ops)
+            # create_pyproxies=False makes passing a python object as a ref fail loudly instead of leaking a proxy
+            self._execute(self._ctx, self._js_ops, length, to_js(self._refs, create_pyproxies=False))
+            del self._ops[:]
+            self._refs.clear()
+            self._string_refs.clear()
+            self._object_refs.clear()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name.startswith("_"):
+            super().__setattr__(name, value)
+            return
+        state = self._state
+        if name in state and state[name] == value:
+            self._elided_writes += 1
+            return
+        state[name] = value
+        self._property_writes += 1
+        self._record(SET_PROPERTY, (name, value))
+
+    def __getattr__(self, name: str) -> Any:
+        state = self.__dict__.get("_state", {})
+        if name in state:
+            return state[name]
+        if name.startswith("_"):
+            raise AttributeError(name)
+        self.flush()
+        value = getattr(self._ctx, name)
+        if not callable(value):
+            return value
+
+        # cache the bound method as an instance attribute, so later lookups don't even get here
+        method = self.__dict__[name] = self._forwarding_method(value)
+        return method
+
+    def _forwarding_method(self, method: Callable[..., Any]) -> Callable[..., Any]:
+        """Wrap a method of the real context so it runs after whatever was recorded before it."""
+
+        def call(*args: Any) -> Any:
+            self.flush()
+            converted = (to_js(arg, create_pyproxies=False) if isinstance(arg, list | tuple) else arg for arg in args)
+            return method(*converted)
+
+        return call
+
+
+def _make_recorder(opcode: int) -> Callable[..., None]:
+    def record(self: DrawBuffer, *args: Any) -> None:
+        self._record(opcode, args)
+
+    record.__name__ = RECORDED_METHODS[opcode]
+    return record
+
+
+for _opcode, _name in enumerate(RECORDED_METHODS):
+    if _opcode not in (SAVE, RESTORE):
+        setattr(DrawBuffer, _name, _make_recorder(_opcode))
@@ -2,8 +2,11 @@ from asteroid import AsteroidAttack
 from consolelogger import getLogger
 from controls import GameControls
 from debris import DebrisSystem
-from js import document  # type: ignore[attr-defined]
+from drawbuffer import DrawBuffer
+from hud import Hud
+from js import document, localStorage  # type: ignore[attr-defined]
 from player import Player, Scanner
+from quality import QualityGovernor
 from pyodide.ffi import create_proxy  # type: ignore[attr-defined]
 from scene_classes import Scene
 from scene_descriptions import create_scene_manager
@@ -14,24 +17,72 @@ log = getLogger(__name__)
 # References to the useful html elements
 loadingLabel = document.getElementById("loadingLabel")
 container = document.getElementById("canvasContainer")
-width, height = container.clientWidth, container.clientHeight
 canvas = window.canvas
-ctx = window.ctx = window.canvas.getContext("2d")
+# render code draws into a recording context, which replays the whole frame on the real one in a single call
+ctx = window.ctx = DrawBuffer(window.canvas.getContext("2d"))
 
 window.DEBUG_DRAW_HITBOXES = False
 
+# created before the first resize, since the quality tier decides the render scale
+quality = window.quality = QualityGovernor()
+
+# localStorage key for a render scale picked by the player, without one the scale follows the quality tier
+RENDER_SCALE_KEY = "render_scale"
+# most pixels the canvas gets to render, about 1080p. Bigger windows (4K full screen) render at a lower scale
+MAX_RENDER_PIXELS = 1920 * 1080
+
+
+def get_render_scale(width: int, height: int) -> float:
+    """Get the size of the canvas backing store relative to its size on the page."""
+    scale = quality.tier.render_scale
+    chosen = localStorage.getItem(RENDER_SCALE_KEY)
+    if chosen:
+        try:
+            chosen_scale = float(chosen)
+        except ValueError:
+            log.warning("Ignoring the stored render scale %r, it's not a number", chosen)
+        else:
+            # NaN and anything up to 0 would leave nothing to render, more than 1 renders more pixels than shown
+            if chosen_scale > 0:
+                scale = min(chosen_scale, 1.0)
+    area = width * height
+    if area * scale * scale > MAX_RENDER_PIXELS:
+        scale = (MAX_RENDER_PIXELS / area) ** 0.5
+    return scale
+
+
 # TODO: the resizing and margins needs work, I suck with CSS / html layout
 def resize_canvas(event=None) -> None:
     width, height = container.clientWidth, container.clientHeight
-    canvas.width = width
-    canvas.height = height
+    viewport = window.viewport
+    viewport.resize(width, height, get_render_scale(width, height))
+    # the backing store can be smaller than the canvas on the page, the browser upscales it (see styles.css)
+    canvas.width = viewport.pixel_width
+    canvas.height = viewport.pixel_height
     canvas.style.width = f"{width}px"
     canvas.style.height = f"{height}px"
+    # resizing the canvas resets the context, so none of the shadowed properties hold anymore
+    ctx.invalidate_state()
 
 
 resize_proxy = create_proxy(resize_canvas)
 window.addEventListener("resize", resize_proxy)
 resize_canvas()
+width, height = window.viewport.width, window.viewport.height
+# tier the current render scale was picked for
+render_scale_tier = quality.tier
+
+
+def set_render_scale(scale: float | None) -> None:
+    """Render at a fixed fraction of the canvas size on the page, or let the quality tier decide with None."""
+    if scale is None:
+        localStorage.removeItem(RENDER_SCALE_KEY)
+    else:
+        localStorage.setItem(RENDER_SCALE_KEY, str(scale))
+    resize_canvas()
+
+
+window.set_render_scale = set_render_scale
 
 """
 I'm not entirely clear on what this create_proxy is doing, but when passing python functions as callbacks to
@@ -42,9 +93,8 @@ instead of passing them as straight up python function references.
 # setup of important systems, expose them globally via window object
 controls = window.controls = GameControls(canvas)
 scene_manager = window.scene_manager = create_scene_manager()
-player = window.player = Player(
-    window.get_sprite("player"), window.get_sprite("health"), canvas.width / 2, canvas.height / 2, scale=0.1
-)
+window.hud = Hud(window.get_sprite("health"), window.get_sprite("scanner"))
+player = window.player = Player(window.get_sprite("player"), width / 2, height / 2, scale=0.1)
 window.asteroids = AsteroidAttack(window.get_sprite("asteroids"), width, height, 256)
 window.debris = DebrisSystem()
 
@@ -56,6 +106,16 @@ loadingLabel.style.display = "none"
 
 def game_loop(timestamp: float) -> None:
     """Timestamp argument will be time since the html document began to load, in miliseconds."""
+    global render_scale_tier
+
+    quality.update(timestamp)
+    if quality.tier is not render_scale_tier:
+        render_scale_tier = quality.tier
+        resize_canvas()
+
+    # everything is drawn in CSS pixels, scaled down to the size of the backing store
+    scale = window.viewport.render_scale
+    ctx.setTransform(scale, 0, 0, scale, 0, 0)
 
     # these should disable bilinear filtering smoothing, which isn't friendly to pixelated graphics
     ctx.imageSmoothingEnabled = False
@@ -63,8 +123,10 @@ def game_loop(timestamp: float) -> None:
     ctx.mozImageSmoothingEnabled = False
     ctx.msImageSmoothingEnabled = False
 
+    controls.update()
     active_scene: Scene = scene_manager.get_active_scene()
     active_scene.render(ctx, timestamp)
+    ctx.flush()
 
     # if a click event occurred and nothing made use of it during this loop, clear the click flag
     controls.click = False
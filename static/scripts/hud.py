@@ -0,0 +1,137 @@
+"""Heads-up display, the health and scan progress bars at the bottom right of the screen.
+
+A bar's icon and border only change when the canvas is resized, so they're drawn once onto a chrome surface. The
+whole bar, the chrome with the fills over it, is kept on another surface that's only drawn again when a fill grows or
+shrinks by a whole pixel. Putting a bar on screen is one drawImage per frame either way.
+
+The red fill behind the health is a damage trail, it shows the health from DAMAGE_TRAIL_MS ago so the part that was
+just lost stays visible for a moment.
+
+Usage
+-------
+window.hud.render_health(ctx, player.health / Player.FULL_HEALTH, timestamp)
+window.hud.render_scan_progress(ctx, 0.5)
+"""
+
+import math
+from collections import deque
+
+from common import CanvasRenderingContext2D, Rect, SpriteSheet
+from surface import Surface
+from window import window
+
+BAR_HEIGHT = 12
+# distance of the health bar from the right and bottom edges of the screen
+BAR_PADDING = 30
+# bars are stacked this far apart, from the health bar down
+ROW_SPACING = 24
+# icons are drawn this far left of their bar
+ICON_OFFSET = 30
+# how far behind the health the damage trail lags
+DAMAGE_TRAIL_MS = 3333
+
+HEALTH_COLOR = "#00FF00"
+DAMAGE_COLOR = "#FF0000"
+SCAN_COLOR = "#FF0000"
+BORDER_COLOR = "#FFFFFF"
+
+
+class DamageTrail:
+    """A value as it was a fixed time ago."""
+
+    def __init__(self, delay_ms: float, value: float) -> None:
+        self.delay_ms = delay_ms
+        self.value = value
+        self._latest = value
+        # (timestamp, value) of every change that's not old enough to show yet
+        self._changes: deque[tuple[float, float]] = deque()
+
+    def update(self, value: float, timestamp: float) -> float:
+        """Record the current value and get the value from delay_ms before the timestamp."""
+        if value != self._latest:
+            self._changes.append((timestamp, value))
+            self._latest = value
+        changes = self._changes
+        while changes and timestamp - changes[0][0] >= self.delay_ms:
+            self.value = changes.popleft()[1]
+        return self.value
+
+
+class HudBar:
+    """A bar with an icon left of it and fills drawn over each other inside its border."""
+
+    def __init__(self, icon: SpriteSheet, row: int, icon_size: tuple[int, int] | None = None) -> None:
+        self.icon = icon
+        self.row = row
+        # None draws the icon at its own size
+        self.icon_size = icon_size
+        self._icon_loaded = False
+        self.chrome = Surface()
+        self.surface = Surface()
+
+    def bounds(self) -> Rect:
+        """Outline of the bar on screen."""
+        viewport = window.viewport
+        width = viewport.width // 4
+        left = viewport.width - width - BAR_PADDING
+        top = viewport.height - BAR_HEIGHT - BAR_PADDING + self.row * ROW_SPACING
+        return Rect(left, top, width, BAR_HEIGHT)
+
+    def render(self, ctx: CanvasRenderingContext2D, fills: tuple[tuple[str, float], ...]) -> None:
+        """Draw the bar with (color, fraction) fills, the later ones over the earlier ones."""
+        bounds = self.bounds()
+        inner_width = bounds.width - 4
+        # fills only get drawn again once they change by a whole pixel
+        fill_widths = tuple((color, round(inner_width * min(max(fraction, 0.0), 1.0))) for color, fraction in fills)
+
+        origin_x = math.floor(bounds.left) - ICON_OFFSET
+        origin_y = math.floor(bounds.top) - 2
+        self._render_chrome(bounds, origin_x, origin_y)
+        if self.surface.prepare(self.chrome.width, self.chrome.height, key=(self.chrome.key, fill_widths)):
+            bar_ctx = self.surface.ctx
+            bar_ctx.drawImage(self.chrome.canvas, 0, 0)
+            for color, width in fill_widths:
+                if width > 0:
+                    bar_ctx.fillStyle = color
+                    bar_ctx.fillRect(bounds.left + 2 - origin_x, bounds.top + 2 - origin_y, width, BAR_HEIGHT - 4)
+
+        self.surface.draw(ctx, origin_x, origin_y)
+
+    def _render_chrome(self, bounds: Rect, origin_x: int, origin_y: int) -> None:
+        """Draw the icon and border onto the chrome surface, when the bar moved or the icon loaded since last time."""
+        # once the icon has loaded it stays loaded, so stop asking the image every frame
+        self._icon_loaded = self._icon_loaded or self.icon.is_loaded
+        key = (tuple(bounds), self._icon_loaded)
+        if key == self.chrome.key:
+            return
+
+        icon_width, icon_height = self.icon_size or (self.icon.width, self.icon.height)
+        # room for the border stroke, which is centered on the outline
+        width = bounds.right + 1 - origin_x
+        height = max(icon_height, bounds.bottom + 1 - origin_y)
+        self.chrome.prepare(width, height, key)
+
+        chrome_ctx = self.chrome.ctx
+        if self._icon_loaded:
+            chrome_ctx.drawImage(self.icon.image, 0, 0, icon_width, icon_height)
+        chrome_ctx.lineWidth = 1
+        chrome_ctx.strokeStyle = BORDER_COLOR
+        chrome_ctx.strokeRect(bounds.left - origin_x, bounds.top - origin_y, bounds.width, bounds.height)
+
+
+class Hud:
+    """The bars of the heads-up display."""
+
+    def __init__(self, health_icon: SpriteSheet, scan_icon: SpriteSheet) -> None:
+        self.health_bar = HudBar(health_icon, row=0)
+        self.scan_bar = HudBar(scan_icon, row=1, icon_size=(16, 16))
+        self.damage_trail = DamageTrail(DAMAGE_TRAIL_MS, 1.0)
+
+    def render_health(self, ctx: CanvasRenderingContext2D, health: float, timestamp: float) -> None:
+        """Draw the health bar for health as a fraction of full health, with the damage trail behind it."""
+        trail = self.damage_trail.update(health, timestamp)
+        self.health_bar.render(ctx, ((DAMAGE_COLOR, trail), (HEALTH_COLOR, health)))
+
+    def render_scan_progress(self, ctx: CanvasRenderingContext2D, progress: float) -> None:
+        """Draw the scan progress bar for progress as a fraction of a full scan."""
+        self.scan_bar.render(ctx, ((SCAN_COLOR, progress),))
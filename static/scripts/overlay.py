@@ -1,13 +1,24 @@
+import math
 import re
+from functools import cache
 
+from bitmapfont import draw_text, measure_text
+from textlayout import TextLayout, layout_text
 from window import window
 from common import Position, CanvasRenderingContext2D, Rect
 from consolelogger import getLogger
 from scene_classes import Scene, SceneManager
 from spacemass import SpaceMass
+from surface import Surface
 
 log = getLogger(__name__)
 
+# room around the overlay on its surface for the half of the border stroke that lies outside of it
+SURFACE_PADDING = 2
+# longest time the credits scroll for in one update
+MAX_SCROLL_STEP_MS = 100
+
+@cache
 def rgba_to_hex(rgba_str):
     """
     Convert "rgba(r, g, b, a)" to hex string "#RRGGBB".
@@ -28,6 +39,7 @@ class TextOverlay(Scene):
         super().__init__(name, scene_manager)
         self.bold = False
         self.color = color
+        self.surface = Surface()
         self.calculate_and_set_font()
         self.set_text(text)
         self.char_delay = 10  # milliseconds between characters
@@ -49,24 +61,106 @@ class TextOverlay(Scene):
     def set_text(self, text: str):
         """ 
         Set a new text message for this object to display and resets relevant properties like the 
-        current character position to be ready to start over. Text width is calculated for centered text
-        rendering.
+        current character position to be ready to start over.
         """
-        self.displayed_text = ""
         self.text = text
         self.char_index = 0
         self.last_char_time = 0
+        self.surface.invalidate()
+
+    def wrap_width(self) -> float | None:
+        """Width to wrap lines of text at, or None to only break them at newlines."""
+        return None
+
+    def get_layout(self) -> TextLayout:
+        """
+        Get the line breaks and line widths of the text, they're only worked out once per text, font size and
+        wrapping width, and streaming just reveals more characters of them.
+        """
+        return layout_text(window.ctx, self.text, self.font["size"], self.wrap_width(), bold=self.bold)
+
+    def _surface_origin(self, overlay_bounds: Rect) -> tuple[int, int]:
+        # whole pixels, so the text on the surface lands on whole pixels on screen too
+        return math.floor(overlay_bounds.left) - SURFACE_PADDING, math.floor(overlay_bounds.top) - SURFACE_PADDING
+
+    def _render_surface(self, overlay_bounds: Rect):
+        """
+        Bring the surface up to date, drawing the console background, border and hint only when the bounds, color or
+        text changed, and otherwise just the characters revealed since the last frame.
+        """
+        surface = self.surface
+        font = self.font or self.calculate_and_set_font()
+        layout = self.get_layout()
+        origin_x, origin_y = self._surface_origin(overlay_bounds)
+        key = (tuple(overlay_bounds), self.color, font["size"], self.bold, self.hint, layout)
+        width = overlay_bounds.right + SURFACE_PADDING - origin_x
+        height = overlay_bounds.bottom + SURFACE_PADDING - origin_y
+        if surface.prepare(width, height, key):
+            # draw in screen coordinates
+            surface.ctx.setTransform(1, 0, 0, 1, -origin_x, -origin_y)
+            self._draw_console(surface.ctx, overlay_bounds, font)
+            self._drawn_chars = 0
+            self._drawn_lines = 0
+
+        if self.char_index > self._drawn_chars:
+            self._draw_revealed_text(surface.ctx, overlay_bounds, font, layout)
+
+    def _draw_console(self, ctx: CanvasRenderingContext2D, overlay_bounds: Rect, font: dict):
+        # Draw transparent console background
+        ctx.fillStyle = "rgba(0, 0, 0, 0.8)"
+
+        ctx.fillRect(*overlay_bounds)
+
+        # Draw console border
+        ctx.strokeStyle = self.color
+        ctx.lineWidth = 2
+        ctx.strokeRect(*overlay_bounds)
+        ctx.strokeRect(
+            overlay_bounds.left + 3, overlay_bounds.top + 3, overlay_bounds.width - 6, overlay_bounds.height - 6
+        )
+
+        # Draw hint if any at bottom left
+        if self.hint:
+            text_color = rgba_to_hex(self.color)
+            draw_text(ctx, self.hint, overlay_bounds.left + 10, overlay_bounds.bottom - 10, font["size"], text_color)
 
-        # calculate text width in case we want centered text, we won't have to calculate it every frame
-        self._prepare_font(window.ctx)
-        self._text_width = max(window.ctx.measureText(line).width for line in self.text.split("\n"))
+    def _draw_revealed_text(self, ctx: CanvasRenderingContext2D, overlay_bounds: Rect, font: dict, layout: TextLayout):
+        """Draw the characters revealed since the last call onto the surface, the ones before are already on it."""
+        text_color = rgba_to_hex(self.color)
+        lines = layout.revealed(self.char_index)
+        line_height = font["size"] + 4
+
+        if self.center:
+            # Center both horizontally and vertically, on all lines so the text doesn't move while it streams
+            total_text_height = len(layout.lines) * line_height
+            start_y = overlay_bounds.top + (overlay_bounds.height - total_text_height) / 2 + font["size"]
+            start_x = (window.viewport.width - layout.width) / 2
+        else:
+            start_y = overlay_bounds.top + font["size"] + 10  # use overlay_bounds.top
+            start_x = overlay_bounds.left + 10
+
+        for i in range(self._drawn_lines, len(lines)):
+            y_pos = start_y + i * line_height
+            if y_pos >= overlay_bounds.bottom - 10:  # don't draw outside overlay
+                break
+            # continue the line where the last call left off
+            column = max(0, self._drawn_chars - layout.starts[i])
+            part = lines[i][column:]
+            if part:
+                x_pos = start_x
+                if column:
+                    x_pos += measure_text(ctx, lines[i][:column], font["size"], bold=self.bold)
+                draw_text(ctx, part, x_pos, y_pos, font["size"], text_color, bold=self.bold)
+
+        self._drawn_lines = max(0, len(lines) - 1)
+        self._drawn_chars = self.char_index
 
     def set_button(self, button_label: str | None):
         self.button_label = button_label
 
     def calculate_and_set_font(self) -> str:
         # Set text style based on window size
-        base_size = min(window.canvas.width, window.canvas.height) / 50
+        base_size = window.viewport.min_side / 50
         font_size = max(12, min(20, base_size))  # Scale between 12px and 20px
         self.font = {"size": font_size, "font": "'Courier New', monospace"}
         return self.font
@@ -78,19 +172,11 @@ class TextOverlay(Scene):
             if not self.muted:
                 window.audio_handler.play_text()
                 
-            chars_to_add = min(3, len(self.text) - self.char_index)
-            self.displayed_text += self.text[self.char_index : self.char_index + chars_to_add]
-            self.char_index += chars_to_add
+            self.char_index += min(3, len(self.text) - self.char_index)
             self.last_char_time = timestamp
             if self.char_index == len(self.text):
                 window.audio_handler.play_text(pause_it=True)
 
-    def _prepare_font(self, ctx):
-        font = self.font or self.calculate_and_set_font()
-        ctx.font = f"{'bold ' if self.bold else ''}{font['size']}px {font['font']}"
-        ctx.fillStyle = rgba_to_hex(self.color)
-        return font
-
     def render_and_handle_button(self, ctx: CanvasRenderingContext2D, overlay_bounds: Rect) -> Rect:
         """
         this function returns the button's bounding Rect as a byproduct, so it can be
@@ -100,8 +186,7 @@ class TextOverlay(Scene):
             return None
 
         ctx.save()
-        ctx.font = "14px Courier New"
-        text_width = ctx.measureText(self.button_label).width
+        text_width = measure_text(ctx, self.button_label, 14)
 
         button_bounds = Rect(overlay_bounds.right - (text_width + 30), overlay_bounds.bottom - 44, text_width + 20, 34)
 
@@ -109,12 +194,8 @@ class TextOverlay(Scene):
         ctx.fillRect(*button_bounds)
 
         # check whether mouse is currently moving over the button
-        if button_bounds.contains(window.controls.mouse.move):
-            ctx.fillStyle = "#ffff00"
-        else:
-            ctx.fillStyle = "#00ff00"
-
-        ctx.fillText(self.button_label, button_bounds.left + 10, button_bounds.bottom - 10)
+        label_color = "#ffff00" if button_bounds.contains(window.controls.mouse.move) else "#00ff00"
+        draw_text(ctx, self.button_label, button_bounds.left + 10, button_bounds.bottom - 10, 14, label_color)
         ctx.strokeStyle = "rgba(0, 255, 0, 0.95)"
         ctx.lineWidth = 2
         ctx.strokeRect(*button_bounds)
@@ -132,46 +213,13 @@ class TextOverlay(Scene):
             x, y, width, height = self.rect
             overlay_bounds = Rect(x, y, width, height)
         else:
-            overlay_width = window.canvas.width - 2 * self.margins.x
-            overlay_height = window.canvas.height - 2 * self.margins.y
+            overlay_width = window.viewport.width - 2 * self.margins.x
+            overlay_height = window.viewport.height - 2 * self.margins.y
             overlay_bounds = Rect(self.margins.x, self.margins.y, overlay_width, overlay_height)
 
-        # Draw transparent console background
-        ctx.fillStyle = "rgba(0, 0, 0, 0.8)"
-
-        ctx.fillRect(*overlay_bounds)
-
-        # Draw console border
-        ctx.strokeStyle = self.color
-        ctx.lineWidth = 2
-        ctx.strokeRect(*overlay_bounds)
-        ctx.strokeRect(
-            overlay_bounds.left + 3, overlay_bounds.top + 3, overlay_bounds.width - 6, overlay_bounds.height - 6
-        )
-
-        font = self._prepare_font(ctx)
-
-        # Draw streaming text
-        lines = self.displayed_text.split("\n")
-        line_height = font["size"] + 4
-        
-        if self.center:
-            # Center both horizontally and vertically
-            total_text_height = len(lines) * line_height
-            start_y = overlay_bounds.top + (overlay_bounds.height - total_text_height) / 2 + font["size"]
-            start_x = (window.canvas.width - self._text_width) / 2 
-        else:
-            start_y = overlay_bounds.top + font["size"] + 10  # use overlay_bounds.top
-            start_x = overlay_bounds.left + 10 
-
-        for i, line in enumerate(lines):
-            y_pos = start_y + i * line_height
-            if y_pos < overlay_bounds.bottom - 10:       # don't draw outside overlay
-                ctx.fillText(line, start_x, y_pos)
-        
-        # Draw hint if any at bottom left
-        if self.hint:
-            ctx.fillText(self.hint, overlay_bounds.left + 10, overlay_bounds.bottom - 10)
+        # the console with the text revealed so far is kept on a surface, so a frame only draws the new characters
+        self._render_surface(overlay_bounds)
+        self.surface.draw(ctx, *self._surface_origin(overlay_bounds))
 
         button_bounds = self.render_and_handle_button(ctx, overlay_bounds)
         if window.controls.click:
@@ -204,7 +252,7 @@ class DeathScreen(TextOverlay):
         self.bold = True
     
     def calculate_and_set_font(self) -> str:
-        base_size = min(window.canvas.width, window.canvas.height) / 15
+        base_size = window.viewport.min_side / 15
         font_size = max(32, min(72, base_size))  # Scale between 32px and 72px
         self.font = {"size": font_size, "font": "'Courier New', monospace"}
         return self.font
@@ -242,56 +290,42 @@ class Dialogue(TextOverlay):
             self.done = True
             self.deactivate()
 
-    def render(self, ctx: CanvasRenderingContext2D, timestamp):
-        """Render the currently active line."""
-
-        message_parts = self.lines[self.current_index].strip().split(' ')
-        split_message = []
-        len_text_line = 0
-        partial_message = ''
-    
-        for part in message_parts:
-            word_width = ctx.measureText(part + ' ').width  # include space
-            if len_text_line + word_width <= self.rect[2]:
-                partial_message += part + ' '
-                len_text_line += word_width
-            else:
-                # save current line before adding the new word
-                split_message.append(partial_message.rstrip())
-                # start new line with current word
-                partial_message = part + ' '
-                len_text_line = word_width
-
-        if partial_message:
-            split_message.append(partial_message.rstrip())
-
-        formatted_message = ''
-        for part in split_message:
-            formatted_message += part + '\n'
-        self.text = formatted_message
+    def wrap_width(self) -> float | None:
+        """Wrap the dialogue to the width of its box."""
+        return self.rect[2] if self.rect else None
 
-        super().render(ctx, timestamp)
-        
     def switch_color(self):
         self.is_col1 = not self.is_col1
         if self.is_col1:
             self.color = "rgba(0, 255, 0, 0.8)"  
         else:
             self.color = "rgba(170, 255, 0, 0.8)" 
+        # the text on the surface is in the old color
+        self.surface.invalidate()
 
 class Credits:
-    """Simple scrolling credits"""
+    """
+    Simple scrolling credits. They're drawn once onto a strip as wide as the canvas, and scrolled by drawing the part
+    of the strip that's on screen, so a frame costs one drawImage however long the credits are.
+    """
     def __init__(self, credits_text: str, fill_color: str):
         self.credits_lines = credits_text.split("\n") if credits_text else ["No credits available"]
-        self.scroll_speed = 0.4  # pixels per frame
-        self.y_offset = window.canvas.height  * 0.7  # Start near bottom of screen
+        self.scroll_speed = 24  # pixels per second
+        self.y_offset = window.viewport.height  * 0.7  # Start near bottom of screen
         self.line_height = 30
+        self.font_size = 18
         self.fill_color = fill_color
         self.finished = False
+        self.strip = Surface()
+        self.last_update_time = None
         
     def update(self, timestamp):
         """Update the scroll position."""
-        self.y_offset -= self.scroll_speed
+        if self.last_update_time is not None:
+            # a long gap means the scene wasn't shown or the tab was hidden, carry on from where the credits were
+            elapsed = min(timestamp - self.last_update_time, MAX_SCROLL_STEP_MS)
+            self.y_offset -= self.scroll_speed * elapsed / 1000
+        self.last_update_time = timestamp
         
         # Check if credits have finished scrolling
         if not self.finished:
@@ -299,23 +333,27 @@ class Credits:
             # log.debug("Credits Last Line Y Offset: %s", last_line_y)
             if last_line_y < 0:
                 self.finished = True
+
+    def _render_strip(self):
+        """Draw all lines onto the strip, when the canvas width changed since the last time."""
+        width = window.viewport.width
+        # a line of room above the first baseline for the glyphs to reach up into
+        height = (len(self.credits_lines) + 1) * self.line_height
+        if self.strip.prepare(width, height, key=(width, self.fill_color)):
+            for i, line in enumerate(self.credits_lines):
+                y_pos = (i + 1) * self.line_height
+                draw_text(self.strip.ctx, line, width / 2, y_pos, self.font_size, self.fill_color, align="center")
         
     def render(self, ctx, timestamp):
         """Render the scrolling credits."""
         if self.finished:
             return
-        
-        ctx.save()
-        ctx.font = f"18px Courier New"
-        ctx.fillStyle = self.fill_color
-        ctx.textAlign = "center"
-        
-        # Draw each line of credits
-        for i, line in enumerate(self.credits_lines):
-            y_pos = self.y_offset + (i * self.line_height)
-            # Only render if the line is visible on screen
-            if -self.line_height <= y_pos <= window.canvas.height + self.line_height:
-                ctx.fillText(line, window.canvas.width / 2, y_pos)
-        
-        ctx.restore()
 
+        self._render_strip()
+        # only the part of the strip that's on screen gets drawn
+        strip_top = round(self.y_offset) - self.line_height
+        source_top = max(0, -strip_top)
+        height = min(self.strip.height - source_top, math.ceil(window.viewport.height) - max(0, strip_top))
+        if height > 0:
+            source = Rect(0, source_top, self.strip.width, height)
+            self.strip.draw_region(ctx, source, 0, max(0, strip_top))
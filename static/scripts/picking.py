@@ -0,0 +1,80 @@
+"""Index of clickable and hoverable things on screen, for finding what is under the mouse.
+
+Targets are circles (planets) or rects (buttons) registered under a key, which is what picking returns. Rects are
+treated as UI drawn on top, so they win over circles. Among overlapping circles the one whose center is closest wins.
+
+Rects stay put from frame to frame, so which of them is hovered is cached until the mouse moves or a rect changes.
+Circles move every frame with their planets, there are few of them and they're tested on every lookup.
+
+Usage
+-------
+picking = PickingIndex()
+picking.set_circle(planet, x, y, radius)
+picking.set_rect("some-button", Rect(...))
+hovered = picking.hovered(window.controls.mouse.move)
+clicked = picking.pick(window.controls.mouse.click)
+"""
+
+from typing import Any
+
+from common import Position, Rect
+
+
+class PickingIndex:
+    """Circle and rect targets by key, with the hovered rect cached."""
+
+    def __init__(self) -> None:
+        # key -> (x, y, radius)
+        self._circles: dict[Any, tuple[float, float, float]] = {}
+        # key -> (left, top, right, bottom)
+        self._rects: dict[Any, tuple[float, float, float, float]] = {}
+        # mouse position the hovered rect was looked up for, None once the rects changed
+        self._hover_pos: tuple[float, float] | None = None
+        self._hovered_rect: Any = None
+
+    def set_circle(self, key: Any, x: float, y: float, radius: float) -> None:
+        """Add a circle target or move an existing one."""
+        self._circles[key] = (x, y, radius)
+
+    def set_rect(self, key: Any, rect: Rect) -> None:
+        """Add a rect target or move an existing one."""
+        bounds = (rect.left, rect.top, rect.right, rect.bottom)
+        if self._rects.get(key) != bounds:
+            self._rects[key] = bounds
+            self._hover_pos = None
+
+    def remove(self, key: Any) -> None:
+        """Remove a target, if it's there."""
+        self._circles.pop(key, None)
+        if self._rects.pop(key, None) is not None:
+            self._hover_pos = None
+
+    def pick(self, pos: Position) -> Any:
+        """Get the key of the target at the position, or None."""
+        rect = self._pick_rect(pos.x, pos.y)
+        return rect if rect is not None else self._pick_circle(pos.x, pos.y)
+
+    def hovered(self, pos: Position) -> Any:
+        """Like pick, with the rect lookup cached until the position or the rects change."""
+        if self._hover_pos != (pos.x, pos.y):
+            self._hover_pos = (pos.x, pos.y)
+            self._hovered_rect = self._pick_rect(pos.x, pos.y)
+        if self._hovered_rect is not None:
+            return self._hovered_rect
+        return self._pick_circle(pos.x, pos.y)
+
+    def _pick_rect(self, x: float, y: float) -> Any:
+        for key, (left, top, right, bottom) in self._rects.items():
+            if left <= x <= right and top <= y <= bottom:
+                return key
+        return None
+
+    def _pick_circle(self, x: float, y: float) -> Any:
+        closest = None
+        closest_distance = float("inf")
+        for key, (cx, cy, radius) in self._circles.items():
+            distance = (x - cx) ** 2 + (y - cy) ** 2
+            if distance <= radius * radius and distance < closest_distance:
+                closest_distance = distance
+                closest = key
+        return closest
@@ -1,10 +1,10 @@
 import math
 import time
-from collections import deque
 from dataclasses import dataclass
 import random
 
 from asteroid import Asteroid
+from bitmapfont import draw_text
 from common import Position
 from consolelogger import getLogger
 from scene_classes import SceneObject
@@ -24,7 +24,6 @@ class Player(SceneObject):
     def __init__(
         self,
         sprite: SpriteSheet,
-        bar_icon: SpriteSheet,
         x: float,
         y: float,
         speed: float = 100.0,
@@ -34,7 +33,6 @@ class Player(SceneObject):
         super().__init__()
 
         self.health = Player.FULL_HEALTH
-        self.health_history = deque([Player.FULL_HEALTH] * 200)
         self.sprite = sprite
         self.set_position(x, y)
         self.default_pos = (x, y)
@@ -50,7 +48,6 @@ class Player(SceneObject):
         self.rotation_speed = 8.0
         self.is_moving = False
         self.is_disabled = False
-        self.bar_icon = bar_icon
         self.active = False
         self.invincible = False
         self.key_cooldown = {}
@@ -142,10 +139,10 @@ class Player(SceneObject):
                 self.momentum[1] = 0
 
         # clamp inside canvas
-        canvas = getattr(window, "gameCanvas", None)
-        if canvas and self._half_w and self._half_h:
-            max_x = canvas.width - self._half_w
-            max_y = canvas.height - self._half_h
+        viewport = window.viewport
+        if self._half_w and self._half_h:
+            max_x = viewport.width - self._half_w
+            max_y = viewport.height - self._half_h
             self.x = min(max(self._half_w, self.x), max_x)
             self.y = min(max(self._half_h, self.y), max_y)
 
@@ -185,49 +182,10 @@ class Player(SceneObject):
         if self.active:
             for asteroid in window.asteroids.asteroids:
                 self.check_collision(asteroid)
-            self.render_health_bar(ctx)
+            window.hud.render_health(ctx, self.health / Player.FULL_HEALTH, timestamp)
 
         super().render(ctx, timestamp)
 
-    def render_health_bar(self, ctx):
-        outer_width = window.canvas.width // 4
-        outer_height = 12
-        inner_width = outer_width - 4
-        inner_height = outer_height - 4
-        padding = 30
-
-        ctx.drawImage(
-            self.bar_icon.image,
-            window.canvas.width - outer_width - padding - 30,
-            window.canvas.height - outer_height - padding - 2,
-        )
-
-        ctx.lineWidth = 1
-        ctx.strokeStyle = "#FFFFFF"
-        ctx.strokeRect(
-            window.canvas.width - outer_width - padding,
-            window.canvas.height - outer_height - padding,
-            outer_width,
-            outer_height,
-        )
-
-        ctx.fillStyle = "#FF0000"
-        ctx.fillRect(
-            window.canvas.width - outer_width - padding + 2,
-            window.canvas.height - outer_height - padding + 2,
-            inner_width * self.health_history.popleft() / Player.FULL_HEALTH,
-            inner_height,
-        )
-        self.health_history.append(self.health)
-
-        ctx.fillStyle = "#00FF00"
-        ctx.fillRect(
-            window.canvas.width - outer_width - padding + 2,
-            window.canvas.height - outer_height - padding + 2,
-            inner_width * self.health / Player.FULL_HEALTH,
-            inner_height,
-        )
-
     def check_collision(self, asteroid: Asteroid):
         # skip if asteroid is too far in the background
         if asteroid.size < asteroid.target_size * 0.70:
@@ -431,7 +389,7 @@ class Scanner:
 
         # Add animated scanning lines
         scan_cycle = (time.time() * 2) % 1  # 0 to 1, cycling every 0.5 seconds
-        num_lines = 5
+        num_lines = window.quality.tier.scan_lines
 
         for i in range(num_lines):
             line_progress = (scan_cycle + i * 0.2) % 1
@@ -463,37 +421,7 @@ class Scanner:
             self.finished = True
 
         player_x, player_y = self.player.get_position()
-        # progress bar
-        outer_width = window.canvas.width // 4
-        outer_height = 12
-        inner_width = outer_width - 4
-        inner_height = outer_height - 4
-        padding = 30
-
-        ctx.drawImage(
-            self.sprite.image,
-            window.canvas.width - outer_width - padding - 30,
-            window.canvas.height + outer_height - padding - 2,
-            16,
-            16,
-        )
-
-        ctx.lineWidth = 1
-        ctx.strokeStyle = "#FFFFFF"
-        ctx.strokeRect(
-            window.canvas.width - outer_width - padding,
-            window.canvas.height + outer_height - padding,
-            outer_width,
-            outer_height,
-        )
-
-        ctx.fillStyle = "#FF0000"
-        ctx.fillRect(
-            window.canvas.width - outer_width - padding + 2,
-            window.canvas.height + outer_height - padding + 2,
-            inner_width * self.scanning_progress / self._bar_max,
-            inner_height,
-        )
+        window.hud.render_scan_progress(ctx, self.scanning_progress / self._bar_max)
 
         if self.finished:
             return
@@ -504,9 +432,7 @@ class Scanner:
                 scaled_h = self.sprite.height * self.scale
                 ctx.drawImage(self.sprite.image, player_x - 175, player_y - 25, scaled_w, scaled_h)
             elif self.status.too_close:
-                ctx.fillStyle = "white"
-                ctx.font = "15px Courier New"
-                ctx.fillText("Too close to planet!", player_x - 90, player_y - 50)
+                draw_text(ctx, "Too close to planet!", player_x - 90, player_y - 50, 15, "white")
 
         if self.scanning_progress >= self._bar_max:
             log.debug(f"Done scanning")
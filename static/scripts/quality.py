@@ -0,0 +1,171 @@
+"""Adaptive quality, lowering the detail of effects when frames take too long and raising it again once they don't.
+
+The game loop feeds every frame's timestamp to QualityGovernor.update(). It keeps a rolling average of the frame
+times and steps through TIERS, from the most detailed one down. Render code reads the current tier from
+window.quality.tier to decide how much to draw.
+
+requestAnimationFrame is synced to the display, so frames never measure faster than the refresh interval and there's
+no way to see how much headroom is left. Going back up a tier is a guess that gets undone if it was wrong. Hysteresis
+keeps that from flip-flopping every second:
+-   stepping down needs the average well over the frame budget, stepping up needs it close to the budget
+-   after any change the samples are dropped and a full window has to be measured again
+-   stepping up waits longer after a change than stepping down, and longer still after each step down
+
+Usage
+-------
+tier = window.quality.tier
+if tier.glow:
+    ctx.shadowBlur = 10
+"""
+
+from collections import deque
+from dataclasses import dataclass
+
+from consolelogger import getLogger
+
+log = getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class QualityTier:
+    """Level of detail for the effects that can be scaled back."""
+
+    name: str
+    # share of the stars of each star system that get drawn
+    star_fraction: float
+    # most debris pieces alive at once, the oldest ones go first, None for no limit
+    max_debris: int | None
+    # shadowBlur glow around highlighted planets
+    glow: bool
+    # number of animated lines in the scanner beam
+    scan_lines: int
+    # multiplier on the draw scale asteroids pick their mip level with, below 1 picks smaller levels
+    asteroid_lod_bias: float
+    # size of the canvas backing store relative to its size on the page, unless the player picked one
+    render_scale: float
+
+
+TIERS = (
+    QualityTier(
+        "high", star_fraction=1.0, max_debris=None, glow=True, scan_lines=5, asteroid_lod_bias=1.0, render_scale=1.0
+    ),
+    QualityTier(
+        "medium", star_fraction=0.6, max_debris=100, glow=True, scan_lines=3, asteroid_lod_bias=0.75, render_scale=0.75
+    ),
+    QualityTier(
+        "low", star_fraction=0.3, max_debris=40, glow=False, scan_lines=1, asteroid_lod_bias=0.5, render_scale=0.5
+    ),
+)
+
+# frames longer than this are pauses (the tab was hidden, a breakpoint was hit), not slow rendering
+MAX_FRAME_MS = 250
+# how many transitions to keep for telemetry
+TRANSITION_HISTORY = 20
+
+
+@dataclass(frozen=True)
+class QualityTransition:
+    """A change of tier, kept for telemetry."""
+
+    timestamp: float
+    from_tier: str
+    to_tier: str
+    average_ms: float
+
+
+class QualityGovernor:
+    """Picks a quality tier from a rolling average of the frame times."""
+
+    def __init__(  # noqa: PLR0913
+        self,
+        tiers: tuple[QualityTier, ...] = TIERS,
+        *,
+        target_ms: float = 1000 / 60,
+        window_size: int = 90,
+        downgrade_ratio: float = 1.4,
+        upgrade_ratio: float = 1.1,
+        downgrade_delay_ms: float = 2000,
+        upgrade_delay_ms: float = 8000,
+    ) -> None:
+        self.tiers = tiers
+        self.target_ms = target_ms
+        self.downgrade_ratio = downgrade_ratio
+        self.upgrade_ratio = upgrade_ratio
+        self.downgrade_delay_ms = downgrade_delay_ms
+        self.upgrade_delay_ms = upgrade_delay_ms
+
+        self._tier_index = 0
+        self._samples: deque[float] = deque(maxlen=window_size)
+        self._sample_sum = 0.0
+        self._last_timestamp: float | None = None
+        self._last_change = 0.0
+        # each step down makes the next step up wait longer, so a machine on the edge settles on the lower tier
+        self._downgrades = 0
+        self.transitions: deque[QualityTransition] = deque(maxlen=TRANSITION_HISTORY)
+
+    @property
+    def tier(self) -> QualityTier:
+        """The tier render code should draw at."""
+        return self.tiers[self._tier_index]
+
+    @property
+    def average_ms(self) -> float:
+        """Average frame time over the current window, 0 before any frames were measured."""
+        return self._sample_sum / len(self._samples) if self._samples else 0.0
+
+    def update(self, timestamp: float) -> None:
+        """Record the frame that started at the timestamp, and change tiers if needed."""
+        last, self._last_timestamp = self._last_timestamp, timestamp
+        if last is None:
+            self._last_change = timestamp
+            return
+        frame_ms = timestamp - last
+        if frame_ms <= 0 or frame_ms > MAX_FRAME_MS:
+            return
+
+        samples = self._samples
+        if len(samples) == samples.maxlen:
+            self._sample_sum -= samples[0]
+        samples.append(frame_ms)
+        self._sample_sum += frame_ms
+        if len(samples) < samples.maxlen:
+            return
+
+        average = self.average_ms
+        since_change = timestamp - self._last_change
+        too_slow = average > self.target_ms * self.downgrade_ratio and since_change > self.downgrade_delay_ms
+        upgrade_delay = self.upgrade_delay_ms * (1 + self._downgrades)
+        fast_enough = average < self.target_ms * self.upgrade_ratio and since_change > upgrade_delay
+        if too_slow and self._tier_index < len(self.tiers) - 1:
+            self._downgrades += 1
+            self._change_tier(self._tier_index + 1, timestamp, average)
+        elif fast_enough and self._tier_index > 0:
+            self._change_tier(self._tier_index - 1, timestamp, average)
+
+    def set_tier(self, name: str) -> None:
+        """Switch to a tier by name, for testing tiers by hand from the console."""
+        index = next(i for i, tier in enumerate(self.tiers) if tier.name == name)
+        self._change_tier(index, self._last_timestamp or 0.0, self.average_ms)
+
+    def telemetry(self) -> dict:
+        """Get the current tier, frame time and recent transitions as plain data."""
+        return {
+            "tier": self.tier.name,
+            "average_ms": round(self.average_ms, 2),
+            "transitions": [
+                {"timestamp": t.timestamp, "from": t.from_tier, "to": t.to_tier, "average_ms": round(t.average_ms, 2)}
+                for t in self.transitions
+            ],
+        }
+
+    def _change_tier(self, index: int, timestamp: float, average: float) -> None:
+        transition = QualityTransition(timestamp, self.tier.name, self.tiers[index].name, average)
+        self.transitions.append(transition)
+        log.info(
+            "Quality %s -> %s (average frame %.1f ms)", transition.from_tier, transition.to_tier, transition.average_ms
+        )
+
+        self._tier_index = index
+        self._last_change = timestamp
+        self._samples.clear()
+        self._sample_sum = 0.0
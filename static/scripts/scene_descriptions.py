@@ -1,5 +1,6 @@
 from functools import partial
 
+from bitmapfont import draw_text, measure_text
 from player import Player, PlayerExplosion
 from common import PlanetState, Position, Rect
 from consolelogger import getLogger
@@ -22,6 +23,8 @@ log = getLogger(__name__, False)
 ORBITING_PLANETS_SCENE = "orbiting-planets-scene"
 FINAL_SCENE = "final-scene"
 START_SCENE = "start-scene"
+# picking key of the debug button in the orbiting planets scene
+DEBUG_BUTTON_KEY = "debug-complete-all-button"
 
 def get_controls():
     return window.controls
@@ -40,7 +43,7 @@ def get_scanner():
 
 def draw_black_background(ctx):
     ctx.fillStyle = "black"
-    ctx.fillRect(0, 0, window.canvas.width, window.canvas.height)
+    ctx.fillRect(0, 0, window.viewport.width, window.viewport.height)
 
 # --------------------
 # our main scene with the planets orbiting the sun
@@ -73,6 +76,7 @@ class OrbitingPlanetsScene(Scene):
         self.scene_manager = scene_manager
         # Debug button label
         self._debug_btn_label = "" # disable the extra button by default
+        self._highlighted_planet = None
 
         self.show_cheats_menu()
 
@@ -131,8 +135,7 @@ During ship flight:
         label = self._debug_btn_label
         if not label: return
         ctx.save()
-        ctx.font = "14px Courier New"
-        text_width = ctx.measureText(label).width
+        text_width = measure_text(ctx, label, 14)
         pad_x, pad_y = 10, 8
         x, y = 16, 16
         w, h = text_width + pad_x * 2, 30
@@ -143,15 +146,16 @@ During ship flight:
         ctx.fillRect(*bounds)
 
         # Hover state
-        is_hover = bounds.contains(get_controls().mouse.move)
+        picking = self.solar_sys.picking
+        picking.set_rect(DEBUG_BUTTON_KEY, bounds)
+        is_hover = picking.hovered(get_controls().mouse.move) == DEBUG_BUTTON_KEY
         ctx.strokeStyle = "#ffff00" if is_hover else "#00ff00"
         ctx.lineWidth = 2
         ctx.strokeRect(*bounds)
-        ctx.fillStyle = ctx.strokeStyle
-        ctx.fillText(label, x + pad_x, y + h - 10)
+        draw_text(ctx, label, x + pad_x, y + h - 10, 14, ctx.strokeStyle)
 
         # Click handling
-        if window.controls.click and bounds.contains(window.controls.mouse.click):
+        if window.controls.click and picking.pick(window.controls.mouse.click) == DEBUG_BUTTON_KEY:
             for p in self.solar_sys.planets:
                 p.complete = True
             log.debug("Debug: set all planet completions to True")
@@ -180,12 +184,16 @@ During ship flight:
                 self.planet_info_overlay.center = False
 
     def highlight_hovered_planet(self):
-        # Reset all planets' highlight state first
-        for planet in self.solar_sys.planets:
-            planet.highlighted = False
-
-        planet = self.solar_sys.get_object_at_position(window.controls.mouse.move)
-        if planet is not None and not self.planet_info_overlay.active:
+        planet = None
+        if not self.planet_info_overlay.active:
+            planet = self.solar_sys.get_hovered_object(window.controls.mouse.move)
+
+        # only the planet that was highlighted before can need resetting
+        if planet is not self._highlighted_planet:
+            if self._highlighted_planet is not None:
+                self._highlighted_planet.highlighted = False
+            self._highlighted_planet = planet
+        if planet is not None:
             planet.highlighted = True
 
     def switch_planet_scene(self, planet_name):
@@ -231,7 +239,7 @@ class PlanetScene(Scene):
             pulse_freq_max=6,
         )
         self.planet = planet
-        planet.set_position(0, window.canvas.height // 2)
+        planet.set_position(0, window.viewport.height // 2)
         self.results_overlay = ResultsScreen(f"{planet.name}-results", scene_manager, self.planet)
         self.results_overlay.other_click_callable = self.handle_scene_completion
         self.results_overlay.muted = False
@@ -365,7 +373,7 @@ class StartScene(Scene):
         self.dialogue_manager = Dialogue('dialogue', scene_manager, window.lore)
         self.dialogue_manager.active = True
         self.dialogue_manager.margins = Position(300, 150)
-        self.dialogue_manager.rect=(0, window.canvas.height-150, window.canvas.width, 150)
+        self.dialogue_manager.rect=(0, window.viewport.height-150, window.viewport.width, 150)
         self.dialogue_manager.set_button("Skip Intro")
         self.dialogue_manager.button_click_callable = self.finalize_scene
         self.starsystem = StarSystem3d(100, max_depth=100)
@@ -389,7 +397,7 @@ class StartScene(Scene):
             else:
                 self.bobbing_offset -= 1
 
-            player.y = (window.canvas.height // 2 + self.bobbing_offset)
+            player.y = (window.viewport.height // 2 + self.bobbing_offset)
 
             if abs(self.bobbing_offset) > self.bobbing_max:
                 self.is_bobbing_up = not self.is_bobbing_up
@@ -444,26 +452,31 @@ class FinalScene(Scene):
         self.credits = Credits(window.credits, self.fill_color)
 
     def _draw_earth(self, ctx, timestamp):
+        # Position Earth in upper-right, smaller size like the reference image
+        target_size = int(window.viewport.min_side * 0.15)
+        # draw from the smallest mip level that still has enough pixels for that size
+        sheet = self.earth_sprite
+        if sheet and sheet.frame_size:
+            sheet = sheet.level_for(target_size / sheet.frame_size)
+
         # Advance frame based on time
-        if self.earth_sprite and self.earth_sprite.is_loaded:
+        if sheet and sheet.is_loaded:
             if self.earth_last_frame_time == 0:
                 self.earth_last_frame_time = timestamp
             if timestamp - self.earth_last_frame_time >= self.earth_frame_duration:
-                self.earth_frame = (self.earth_frame + 1) % max(1, self.earth_sprite.num_frames)
+                self.earth_frame = (self.earth_frame + 1) % max(1, sheet.num_frames)
                 self.earth_last_frame_time = timestamp
 
-            frame_size = self.earth_sprite.frame_size if self.earth_sprite.num_frames > 1 else self.earth_sprite.height
-            sx = (self.earth_frame % max(1, self.earth_sprite.num_frames)) * frame_size
+            frame_size = sheet.frame_size if sheet.num_frames > 1 else sheet.height
+            sx = (self.earth_frame % max(1, sheet.num_frames)) * frame_size
             sy = 0
 
-            # Position Earth in upper-right, smaller size like the reference image
-            target_size = int(min(window.canvas.width, window.canvas.height) * 0.15)
             dw = dh = target_size
-            dx = window.canvas.width * 0.65  # Right side of screen
-            dy = window.canvas.height * 0.15  # Upper portion
+            dx = window.viewport.width * 0.65  # Right side of screen
+            dy = window.viewport.height * 0.15  # Upper portion
 
             ctx.drawImage(
-                self.earth_sprite.image,
+                sheet.image,
                 sx, sy, frame_size, frame_size,
                 dx, dy, dw, dh
             )
@@ -472,20 +485,20 @@ class FinalScene(Scene):
         # Draw lunar surface with the top portion visible, like looking across the lunar terrain
         if self.moon_sprite and getattr(self.moon_sprite, "is_loaded", False):
             # Position moon sprite so its upper portion is visible as foreground terrain
-            surface_height = window.canvas.height * 0.5
+            surface_height = window.viewport.height * 0.5
             
             # Scale to fill screen width
-            scale = (window.canvas.width / self.moon_sprite.width)
+            scale = (window.viewport.width / self.moon_sprite.width)
             sprite_scaled_height = self.moon_sprite.height * scale
             
             # Position so the moon extends below the screen, showing only the top portion
-            dy = window.canvas.height - surface_height
+            dy = window.viewport.height - surface_height
             
             ctx.drawImage(
                 self.moon_sprite.image,
                 0, 0, self.moon_sprite.width, self.moon_sprite.height,
-                window.canvas.width - (window.canvas.width * scale)/1.25, dy,   # target left, top
-                window.canvas.width * scale, sprite_scaled_height               # target width, height
+                window.viewport.width - (window.viewport.width * scale)/1.25, dy,   # target left, top
+                window.viewport.width * scale, sprite_scaled_height               # target width, height
             )
 
     def render(self, ctx, timestamp):
@@ -508,9 +521,10 @@ class FinalScene(Scene):
         self._draw_earth(ctx, timestamp)
 
         if self.credits.finished:
-            ctx.font = f"{max(12, int(min(window.canvas.width, window.canvas.height)) * 0.025)}px Courier New"
+            size = max(12, int(window.viewport.min_side) * 0.025)
             instruction = "Click anywhere to return to solar system"
-            ctx.fillText(instruction, window.canvas.width * 0.05, window.canvas.height * 0.25)
+            x, y = window.viewport.width * 0.05, window.viewport.height * 0.25
+            draw_text(ctx, instruction, x, y, size, self.credits.fill_color)
             ctx.restore()
 
             # Handle click to go back to orbiting planets scene
@@ -535,8 +549,8 @@ def create_scene_manager() -> SceneManager:
     their routine.
     """
     manager = SceneManager()
-    planet_scene_state = PlanetState(0, window.canvas.height, 120.0, x=0, y=window.canvas.height // 2)
-    solar_system = SolarSystem([window.canvas.width, window.canvas.height], planet_scene_state=planet_scene_state)
+    planet_scene_state = PlanetState(0, window.viewport.height, 120.0, x=0, y=window.viewport.height // 2)
+    solar_system = SolarSystem([window.viewport.width, window.viewport.height], planet_scene_state=planet_scene_state)
     orbiting_planets_scene = OrbitingPlanetsScene(ORBITING_PLANETS_SCENE, manager, solar_system)
     start_scene = StartScene(START_SCENE, manager)
     manager.add_scene(start_scene)
@@ -1,6 +1,7 @@
 import math
 
 from common import PlanetState, Position
+from picking import PickingIndex
 from scene_classes import SceneObject
 from spacemass import SpaceMass
 from window import window
@@ -58,6 +59,10 @@ class SolarSystem(SceneObject):
             planet.set_position(Position(x, y))
             planet.complete = False
 
+        # planets as circle targets for hovering and clicking, scenes can add their own buttons to it
+        self.picking = PickingIndex()
+        self._update_picking()
+
     def update(self):
         self.update_orbits(0.20)
 
@@ -85,6 +90,12 @@ class SolarSystem(SceneObject):
             # Update position
             self.planets[i].set_position(Position(x, y))
 
+        self._update_picking()
+
+    def _update_picking(self) -> None:
+        for planet in self.planets:
+            self.picking.set_circle(planet, planet.x, planet.y, planet.get_hit_radius())
+
     def render(self, ctx, timestamp):
         """Render the entire solar system"""
         # Render sun at center
@@ -132,15 +143,10 @@ class SolarSystem(SceneObject):
         Returns:
             The space object at the position if found, otherwise None.
         """
-        closest_planet = None
-        closest_distance = float("inf")
-        for planet in self.planets:
-            rect = planet.get_bounding_box()
-            if rect.left <= pos.x <= rect.right and rect.top <= pos.y <= rect.bottom:
-                # Calculate distance from click point to planet center
-                planet_center = Position(rect.left + rect.width / 2, rect.top + rect.height / 2)
-                distance = planet_center.distance(pos)
-                if distance < closest_distance:
-                    closest_distance = distance
-                    closest_planet = planet
-        return closest_planet
+        target = self.picking.pick(pos)
+        return target if isinstance(target, SpaceMass) else None
+
+    def get_hovered_object(self, pos: Position) -> SpaceMass | None:
+        """Same as get_object_at_position, but only looked up again once the position or the planets moved."""
+        target = self.picking.hovered(pos)
+        return target if isinstance(target, SpaceMass) else None
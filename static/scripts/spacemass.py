@@ -1,7 +1,8 @@
+from bitmapfont import draw_text, measure_text
 from common import PlanetState, Rect
 from consolelogger import getLogger
 from scene_classes import SceneObject
-from window import SpriteSheet
+from window import SpriteSheet, window
 
 log = getLogger(__name__)
 
@@ -25,13 +26,15 @@ class SpaceMass(SceneObject):
 
         self.highlighted = False
         self.complete = False
+        # height of a sprite frame, kept once the sheet has loaded instead of asking the image every frame
+        self._frame_height = 0
 
         # State management
 
     def get_bounding_box(self) -> Rect:
         # Scale sprite based on radius
         sprite_size = int(self.state.radius) / 80.0
-        frame_size = self.spritesheet.height
+        frame_size = self.get_frame_height()
 
         left = self.x - frame_size // 2 * sprite_size
         top = self.y - frame_size // 2 * sprite_size
@@ -39,6 +42,16 @@ class SpaceMass(SceneObject):
 
         return Rect(left, top, size, size)
 
+    def get_frame_height(self) -> int:
+        """Height of a frame of the full size sprite sheet, 0 until it's known."""
+        if not self._frame_height:
+            self._frame_height = self.spritesheet.height
+        return self._frame_height
+
+    def get_hit_radius(self) -> float:
+        """Radius of the circle around the planet's position that counts as hovering or clicking it."""
+        return int(self.state.radius) / 80.0 * self.get_frame_height() / 2
+
     def render(self, ctx, timestamp):
         # Update animation timing
         if timestamp - self.animation_timer >= self.frame_delay:
@@ -46,13 +59,17 @@ class SpaceMass(SceneObject):
             self.animation_timer = timestamp
 
         bounds = self.get_bounding_box()
-        frame_position = self.spritesheet.get_frame_position(self.current_frame)
+        # draw from the smallest mip level that still has enough pixels for the size on screen
+        sheet = self.spritesheet
+        if sheet.frame_size:
+            sheet = sheet.level_for(bounds.width / sheet.frame_size)
+        frame_position = sheet.get_frame_position(self.current_frame)
         ctx.drawImage(
-            self.spritesheet.image,
+            sheet.image,
             frame_position.x,
             frame_position.y,
-            self.spritesheet.frame_size,
-            self.spritesheet.frame_size,
+            sheet.frame_size,
+            sheet.frame_size,
             bounds.left,
             bounds.top,
             bounds.width,
@@ -74,9 +91,12 @@ class SpaceMass(SceneObject):
                 highlight = "#ffff00"  # yellow highlight
             ctx.save()
             ctx.strokeStyle = highlight
-            ctx.shadowColor = highlight
             ctx.lineWidth = 3
-            ctx.shadowBlur = 10
+            # the glow is one of the first things to go when frames take too long
+            glow = window.quality.tier.glow
+            if glow:
+                ctx.shadowColor = highlight
+                ctx.shadowBlur = 10
 
             # Draw a circle around the planet
             center_x = bounds.left + bounds.width / 2
@@ -88,15 +108,15 @@ class SpaceMass(SceneObject):
             ctx.stroke()
 
             # draw planet name labels when hovering over
-            ctx.shadowBlur = 0
+            if glow:
+                ctx.shadowBlur = 0
             ctx.beginPath()
             ctx.moveTo(center_x, center_y - radius)
             ctx.lineTo(center_x + 10, center_y - radius - 10)
-            ctx.font = "14px Courier New"
-            ctx.fillStyle = highlight
-            text_width = ctx.measureText(self.name.capitalize()).width
+            label = self.name.capitalize()
+            text_width = measure_text(ctx, label, 14)
             ctx.lineTo(center_x + 15 + text_width, center_y - radius - 10)
-            ctx.fillText(self.name.capitalize(), center_x + 15, center_y - radius - 15)
+            draw_text(ctx, label, center_x + 15, center_y - radius - 15, 14, highlight)
             ctx.stroke()
 
             ctx.restore()
@@ -3,10 +3,6 @@ import random
 
 from scene_classes import SceneObject
 from window import window
-from js import document #type: ignore
-loadingLabel = document.getElementById("loadingLabel")
-container = document.getElementById("canvasContainer")
-width, height = container.clientWidth, container.clientHeight
 
 
 class Star:
@@ -102,8 +98,10 @@ class StarSystem(SceneObject):
         return random.choices(StarSystem.COLORS, weights=StarSystem.WEIGHTS)[0]
 
     def render(self, ctx, timestamp) -> None:
-        """Render every star."""
-        for star in self.stars:
+        """Render every star, or as many as the quality tier allows."""
+        # the stars are placed randomly, so any slice of them is still spread over the whole screen
+        visible = int(len(self.stars) * window.quality.tier.star_fraction)
+        for star in self.stars[:visible]:
             star.render(ctx, timestamp, self.num_stars)
 
         if len(self.stars) == 0:
@@ -113,9 +111,9 @@ class StarSystem(SceneObject):
 
     def create_star(self, x="random", y="random"):
         if x == "random":
-            x = random.randint(0, window.canvas.width)
+            x = random.randint(0, window.viewport.width)
         if y == "random":
-            y = random.randint(0, window.canvas.height)
+            y = random.randint(0, window.viewport.height)
 
         pulse_freq = random.randint(self.pulse_freq_min, self.pulse_freq_max)
         radius = random.randint(self.radius_min, self.radius_max)
@@ -129,7 +127,7 @@ class StarSystem(SceneObject):
             replacement_stars = []
             for index, star in enumerate(self.stars):
                 star.x += 1
-                if abs(star.x) > window.canvas.width or abs(star.y) > window.canvas.height:
+                if abs(star.x) > window.viewport.width or abs(star.y) > window.viewport.height:
                     self.stars.pop(index)
                     replacement_star = self.create_star(0, "random")
                     replacement_stars.append(replacement_star)
@@ -175,6 +173,7 @@ class StarSystem3d:
             self.stars.append(self.create_star())
 
     def create_star(self):
+        width, height = window.viewport.width, window.viewport.height
         x = random.randint(-width//2, width//2)
         y = random.randint(-height//2, height//2)
         z = random.uniform(20, self.max_depth)
@@ -185,15 +184,15 @@ class StarSystem3d:
         return Star3d(radius, x, y, z, pulse_freq, shade=shade, fade_in=fade_in)
 
     def render(self, ctx, speed=0.4, scale=300):
-        cx = window.canvas.width / 2
-        cy = window.canvas.height / 2
+        cx = window.viewport.width / 2
+        cy = window.viewport.height / 2
 
         for index, star in enumerate(self.stars):
             star.update(speed, self.max_depth)
             sx, sy, size = star.project(cx, cy, self.max_radius, scale)
 
             # If star leaves screen, recycle it
-            if sx < 0 or sx > window.canvas.width or sy < 0 or sy > window.canvas.height:
+            if sx < 0 or sx > window.viewport.width or sy < 0 or sy > window.viewport.height:
                 self.stars.pop(index)
                 self.stars.append(self.create_star())
 
@@ -0,0 +1,79 @@
+"""Offscreen canvases that keep what was drawn on them from one frame to the next.
+
+Things that look the same for many frames in a row can be drawn once onto a surface, and then put on screen with a
+single drawImage per frame. A surface is drawn for a key, anything that changes how its content looks, and it's only
+cleared to be drawn again when the key changes.
+
+The surface context draws right away instead of going through a DrawBuffer. It only gets drawn on when its content
+changes, and that way it's up to date before the recorded drawImage that puts it on screen gets flushed.
+
+Usage
+-------
+surface = Surface()
+if surface.prepare(width, height, key=(text, color)):
+    draw_text(surface.ctx, text, ...)
+surface.draw(ctx, x, y)
+"""
+
+import math
+from collections.abc import Hashable
+from typing import Any
+
+from common import CanvasRenderingContext2D, Rect
+from js import document  # type: ignore[attr-defined]
+
+
+class Surface:
+    """An offscreen canvas, cleared when the key it was drawn for changes."""
+
+    def __init__(self) -> None:
+        self.canvas: Any = None
+        self.ctx: CanvasRenderingContext2D = None
+        self.key: Hashable = None
+        # size of the canvas, kept here so checking it doesn't have to ask the canvas every frame
+        self._width = 0
+        self._height = 0
+
+    @property
+    def width(self) -> int:
+        """Width of the canvas, 0 before it was created."""
+        return self._width
+
+    @property
+    def height(self) -> int:
+        """Height of the canvas, 0 before it was created."""
+        return self._height
+
+    def prepare(self, width: float, height: float, key: Hashable) -> bool:
+        """Make the surface the size for the key. Returns True if it was cleared and its content has to be drawn."""
+        width, height = max(1, math.ceil(width)), max(1, math.ceil(height))
+        if self.canvas is None:
+            self.canvas = document.createElement("canvas")
+            self.ctx = self.canvas.getContext("2d")
+        elif key == self.key and (width, height) == (self.width, self.height):
+            return False
+
+        if (width, height) != (self.width, self.height):
+            # resizing clears the canvas and resets its context
+            self.canvas.width = self._width = width
+            self.canvas.height = self._height = height
+        else:
+            self.ctx.setTransform(1, 0, 0, 1, 0, 0)
+            self.ctx.clearRect(0, 0, width, height)
+        self.key = key
+        return True
+
+    def invalidate(self) -> None:
+        """Have the next prepare clear the surface, whatever the key."""
+        self.key = None
+
+    def draw(self, ctx: CanvasRenderingContext2D, x: float, y: float) -> None:
+        """Draw the surface with its top left at x, y."""
+        if self.canvas is not None:
+            # whole pixels keep it as crisp as it was drawn
+            ctx.drawImage(self.canvas, round(x), round(y))
+
+    def draw_region(self, ctx: CanvasRenderingContext2D, source: Rect, x: float, y: float) -> None:
+        """Draw the source rect of the surface at its size, with its top left at x, y."""
+        if self.canvas is not None:
+            ctx.drawImage(self.canvas, *source, round(x), round(y), source.width, source.height)
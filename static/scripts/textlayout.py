@@ -0,0 +1,121 @@
+"""Line breaking and line widths of text, computed once per text, font size and wrapping width.
+
+All of our text is in a monospace font, so the width of a line is its length times the advance of the font. The
+advance comes from the bitmap font when it can draw the size, otherwise it's measured once per font with
+measureText. Only lines with characters outside of ASCII, which could be wider, get measured on their own.
+
+Lines remember where they start in the text, so streaming text can reveal it a character index at a time without
+building any strings up.
+
+Usage
+-------
+layout = layout_text(ctx, text, 14, max_width=400)
+for line in layout.revealed(char_index):
+    draw_text(ctx, line, ...)
+"""
+
+import string
+from dataclasses import dataclass
+
+from bitmapfont import FALLBACK_FAMILY, css_font, get_font
+from common import CanvasRenderingContext2D
+
+# characters known to take exactly one advance
+MONOSPACE_CHARS = frozenset(string.printable)
+# layouts cached before the cache starts over, plenty for every text of every screen
+MAX_CACHED_LAYOUTS = 256
+
+_fallback_advances: dict[str, float] = {}
+_layouts: dict[tuple, "TextLayout"] = {}
+
+
+@dataclass(frozen=True)
+class TextLayout:
+    """The lines a text breaks into, with where each starts in the text and how wide it is."""
+
+    text: str
+    lines: tuple[str, ...]
+    starts: tuple[int, ...]
+    widths: tuple[float, ...]
+
+    @property
+    def width(self) -> float:
+        """Width of the widest line."""
+        return max(self.widths, default=0.0)
+
+    def revealed(self, count: int) -> list[str]:
+        """Get the lines as far as the first count characters of the text reach into them."""
+        revealed = []
+        for line, start in zip(self.lines, self.starts, strict=True):
+            if start > count or (start == count and count < len(self.text)):
+                break
+            revealed.append(line[: count - start])
+        return revealed
+
+
+def glyph_advance(ctx: CanvasRenderingContext2D, size: float, *, bold: bool = False) -> float:
+    """Width of a character of the font that text of this size gets drawn with."""
+    font = get_font(size, bold=bold)
+    if font is not None:
+        return font.advance
+    css = css_font(size, FALLBACK_FAMILY, bold=bold)
+    advance = _fallback_advances.get(css)
+    if advance is None:
+        ctx.font = css
+        advance = _fallback_advances[css] = ctx.measureText("M").width
+    return advance
+
+
+def layout_text(
+    ctx: CanvasRenderingContext2D, text: str, size: float, max_width: float | None = None, *, bold: bool = False
+) -> TextLayout:
+    """Break text into lines at its newlines, and between words to keep lines within max_width if given."""
+    advance = glyph_advance(ctx, size, bold=bold)
+    # the advance is part of the key, so the layouts made before the bitmap font loaded aren't used after
+    key = (text, size, bold, advance, max_width)
+    layout = _layouts.get(key)
+    if layout is None:
+        if len(_layouts) >= MAX_CACHED_LAYOUTS:
+            _layouts.clear()
+        layout = _layouts[key] = _break_lines(ctx, text, size, advance, max_width, bold=bold)
+    return layout
+
+
+def _break_lines(  # noqa: PLR0913
+    ctx: CanvasRenderingContext2D, text: str, size: float, advance: float, max_width: float | None, *, bold: bool
+) -> TextLayout:
+    def measure(line: str) -> float:
+        if MONOSPACE_CHARS.issuperset(line):
+            return len(line) * advance
+        ctx.font = css_font(size, FALLBACK_FAMILY, bold=bold)
+        return ctx.measureText(line).width
+
+    lines, starts, widths = [], [], []
+
+    def add_line(start: int, end: int) -> None:
+        line = text[start:end]
+        lines.append(line)
+        starts.append(start)
+        widths.append(measure(line))
+
+    paragraph_start = 0
+    for paragraph in text.split("\n"):
+        if max_width is None:
+            add_line(paragraph_start, paragraph_start + len(paragraph))
+        else:
+            # greedy, a word goes on the current line if the line with it and a space after it still fits
+            line_start = paragraph_start
+            line_width = 0.0
+            word_start = paragraph_start
+            for word in paragraph.split(" "):
+                word_width = measure(word + " ")
+                if line_width + word_width > max_width and word_start > line_start:
+                    add_line(line_start, word_start - 1)
+                    line_start = word_start
+                    line_width = 0.0
+                line_width += word_width
+                word_start += len(word) + 1
+            add_line(line_start, paragraph_start + len(paragraph))
+        paragraph_start += len(paragraph) + 1
+
+    return TextLayout(text, tuple(lines), tuple(starts), tuple(widths))
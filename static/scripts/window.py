@@ -17,9 +17,14 @@ if TYPE_CHECKING:
     from common import HTMLImageElement
     from controls import GameControls
     from debris import DebrisSystem
+    from hud import Hud
     from player import Player, Scanner
+    from quality import QualityGovernor
 
-from common import SpriteSheet, AsteroidData, PlanetData
+from common import SpriteSheet, AsteroidData, PlanetData, Viewport
+from consolelogger import getLogger
+
+log = getLogger(__name__)
 
 
 class SpritesInterface:
@@ -30,7 +35,12 @@ class SpritesInterface:
 
     def __getitem__(self, key: str) -> "SpriteSheet":
         """Access sprites as SpriteSheet objects."""
-        return SpriteSheet(key, self._window.sprites[key])
+        levels = getattr(self._window, "sprite_lods", {}).get(key)
+        deferred = getattr(self._window, "deferred_sprites", {}).get(key)
+        if deferred is None:
+            return SpriteSheet(key, self._window.sprites[key], levels)
+        size = (deferred["width"], deferred["height"])
+        return SpriteSheet(key, self._window.sprites[key], levels, url=deferred["url"], size=size)
 
 
 class WindowInterface:
@@ -44,10 +54,15 @@ class WindowInterface:
     def __init__(self, js_window: Any) -> None:
         self._window = js_window    
         self._sprites = SpritesInterface(js_window)  # Wrap sprites in SpritesInterface
-        self.DEBUG_DRAW_HITBOXES: bool = getattr(js_window, "DEBUG_DRAW_HITBOXES", False)
+        # python side copies of things hot code reads every frame, see the viewport, quality and DEBUG_DRAW_HITBOXES
+        # properties
+        self._viewport = Viewport(js_window.canvas.width, js_window.canvas.height)
+        self._debug_draw_hitboxes: bool = bool(getattr(js_window, "DEBUG_DRAW_HITBOXES", False))
+        self._quality: QualityGovernor | None = None
         self.audio_handler = js_window.audio_handler
         self._planet_dataclasses: dict[str, PlanetData] = {}
         self._serialize_planets()
+        self._check_texture_budget()
 
     def _serialize_planets(self) -> None:
         """Convert raw planet data from JS to PlanetData dataclass instances."""
@@ -58,6 +73,46 @@ class WindowInterface:
             planet = PlanetData.from_dict(planet_dict)
             self._planet_dataclasses[planet.name] = planet
 
+    def _check_texture_budget(self) -> None:
+        """Warn when the preloaded sprites decode to more memory than the budget set by tools/texture_budget.py."""
+        budget = getattr(self._window, "texture_budget", None)
+        if not budget:
+            return
+
+        sheets = budget["sheets"]
+        deferred = getattr(self._window, "deferred_sprites", {})
+        lods = getattr(self._window, "sprite_lods", {})
+        # sheets with mip levels only preload their smallest level, see index.html
+        preloaded_names = [name for name in self._window.sprites if name not in deferred]
+        preloaded_names += [f"{name}_lod{len(levels)}" for name, levels in lods.items() if levels]
+        preloaded = {name: sheets[name]["decoded_bytes"] for name in preloaded_names if name in sheets}
+        total = sum(preloaded.values())
+        # the rest are full sheets and bigger mip levels, which only get loaded on demand on top of this
+        on_demand = sum(sheet["decoded_bytes"] for sheet in sheets.values()) - total
+        log.debug("Sprites decode to %.1f MiB, up to %.1f MiB more on demand", total / 2**20, on_demand / 2**20)
+
+        if total > budget["budget_bytes"]:
+            largest = sorted(preloaded, key=preloaded.get, reverse=True)[:3]
+            log.warning(
+                "Sprites decode to %.1f MiB, over the texture budget of %.1f MiB. Largest sheets: %s",
+                total / 2**20,
+                budget["budget_bytes"] / 2**20,
+                ", ".join(largest),
+            )
+
+    @property
+    def viewport(self) -> Viewport:
+        """Canvas size, use this instead of window.canvas.width and height."""
+        return self._viewport
+
+    @property
+    def DEBUG_DRAW_HITBOXES(self) -> bool:  # noqa: N802
+        return self._debug_draw_hitboxes
+
+    @DEBUG_DRAW_HITBOXES.setter
+    def DEBUG_DRAW_HITBOXES(self, value: bool) -> None:  # noqa: N802
+        self._debug_draw_hitboxes = value
+
     @property
     def audio_handler(self) -> "AudioHandler":
         return self._window.audio_handler
@@ -98,6 +153,25 @@ class WindowInterface:
     def debris(self, value: "DebrisSystem") -> None:
         self._window.debris = value
 
+    @property
+    def quality(self) -> "QualityGovernor":
+        """The quality governor, kept on the python side since render code reads its tier for every object."""
+        return self._quality
+
+    @quality.setter
+    def quality(self, value: "QualityGovernor") -> None:
+        self._quality = value
+        # still on the JS window, for telemetry() and set_tier() from the console
+        self._window.quality = value
+
+    @property
+    def hud(self) -> "Hud":
+        return self._window.hud
+
+    @hud.setter
+    def hud(self, value: "Hud") -> None:
+        self._window.hud = value
+
     @property
     def scanner(self) -> "Scanner":
         return self._window.scanner
@@ -126,13 +200,17 @@ class WindowInterface:
         """Get a sprite by key - more intuitive than sprites[key]."""
         return self._sprites[key]
 
+    def get_sprite_manifest(self, key: str) -> dict | None:
+        """Get the frame layout of a packed sprite atlas, or None if the sprite is a plain sheet."""
+        return getattr(self._window, "sprite_manifests", {}).get(key)
+
     def __getattr__(self, name: str) -> Any:
         """Dynamic fallback for accessing any window property."""
         return getattr(self._window, name)
 
     def __setattr__(self, name: str, value: Any) -> None:
         """Dynamic fallback for setting any window property."""
-        if name.startswith("_"):
+        if name.startswith("_") or isinstance(getattr(type(self), name, None), property):
             super().__setattr__(name, value)
         else:
             setattr(self._window, name, value)
@@ -0,0 +1,162 @@
+"""Pack sprites tightly into a texture atlas, used by make_spritesheets.py for the asteroid sheet.
+
+Every sprite is trimmed down to the bounding box of its non-transparent pixels and the trimmed sprites are placed with
+the MaxRects algorithm (best short side fit). The manifest records where each sprite ended up in the atlas and where
+its trimmed rect sat inside the original cell, so the game can draw it exactly where the untrimmed sprite would have
+been drawn.
+"""
+
+from dataclasses import dataclass
+
+from PIL import Image
+
+# transparent gap left between packed sprites, so smoothing doesn't bleed neighbours into each other when scaled.
+# It has to survive the atlas being halved for its mip levels too, the same goes for its size being a multiple of ALIGN
+PADDING = 4
+ALIGN = 4
+
+
+@dataclass
+class PackRect:
+    """A rectangle in the atlas, either a placed sprite or free space."""
+
+    x: int
+    y: int
+    width: int
+    height: int
+
+    @property
+    def right(self) -> int:
+        """X coordinate just past the right edge."""
+        return self.x + self.width
+
+    @property
+    def bottom(self) -> int:
+        """Y coordinate just past the bottom edge."""
+        return self.y + self.height
+
+    def intersects(self, other: "PackRect") -> bool:
+        """Whether the two rectangles overlap."""
+        return self.x < other.right and other.x < self.right and self.y < other.bottom and other.y < self.bottom
+
+    def contains(self, other: "PackRect") -> bool:
+        """Whether the other rectangle lies completely inside this one."""
+        return self.x <= other.x and self.y <= other.y and other.right <= self.right and other.bottom <= self.bottom
+
+
+class MaxRectsPacker:
+    """Places rectangles into a fixed size bin, keeping track of the maximal free rectangles left over."""
+
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        self.free = [PackRect(0, 0, width, height)]
+
+    def insert(self, width: int, height: int) -> PackRect | None:
+        """Place a rectangle in the free spot that leaves the shortest side over, or return None if it can't fit."""
+        best = None
+        best_score = (self.width + self.height, self.width + self.height)
+        for free in self.free:
+            if width > free.width or height > free.height:
+                continue
+            left_x, left_y = free.width - width, free.height - height
+            score = (min(left_x, left_y), max(left_x, left_y))
+            if score < best_score:
+                best, best_score = PackRect(free.x, free.y, width, height), score
+
+        if best is not None:
+            self._split_free(best)
+        return best
+
+    def _split_free(self, used: PackRect) -> None:
+        """Replace every free rectangle overlapping the used one with the maximal rectangles around it."""
+        new_free = []
+        for free in self.free:
+            if not free.intersects(used):
+                new_free.append(free)
+                continue
+            if used.x > free.x:
+                new_free.append(PackRect(free.x, free.y, used.x - free.x, free.height))
+            if used.right < free.right:
+                new_free.append(PackRect(used.right, free.y, free.right - used.right, free.height))
+            if used.y > free.y:
+                new_free.append(PackRect(free.x, free.y, free.width, used.y - free.y))
+            if used.bottom < free.bottom:
+                new_free.append(PackRect(free.x, used.bottom, free.width, free.bottom - used.bottom))
+
+        # drop free rectangles that are fully covered by another one
+        self.free = [rect for i, rect in enumerate(new_free) if not self._is_covered(i, new_free)]
+
+    @staticmethod
+    def _is_covered(i: int, rects: list[PackRect]) -> bool:
+        # of identical rectangles only the first one is kept
+        rect = rects[i]
+        return any(j != i and other.contains(rect) and (other != rect or j < i) for j, other in enumerate(rects))
+
+
+def trim(sprite: Image.Image, bbox: tuple[int, int, int, int] | None = None) -> tuple[Image.Image, int, int]:
+    """Crop a sprite to its non-transparent pixels.
+
+    Arguments:
+        sprite (Image.Image): The sprite to crop.
+        bbox (tuple[int, int, int, int] | None): Bounding box of the non-transparent pixels if already known.
+
+    Returns:
+        tuple: The cropped sprite and the offset of the crop inside the original sprite.
+
+    """
+    sprite = sprite.convert("RGBA")
+    if bbox is None:
+        bbox = sprite.getchannel("A").getbbox()
+    if not bbox or bbox[2] <= bbox[0]:
+        # fully transparent, keep a single pixel so it still gets a place in the atlas
+        bbox = (0, 0, 1, 1)
+    return sprite.crop(bbox), bbox[0], bbox[1]
+
+
+def _pack(sizes: list[tuple[int, int]], width: int) -> tuple[list[PackRect], int] | None:
+    """Pack sizes, largest first, into a bin of the given width, returning the placements and the height used."""
+    packer = MaxRectsPacker(width, sum(height for _, height in sizes))
+    order = sorted(range(len(sizes)), key=lambda i: max(sizes[i]), reverse=True)
+    placements: list[PackRect | None] = [None] * len(sizes)
+    for i in order:
+        placement = packer.insert(*sizes[i])
+        if placement is None:
+            return None
+        placements[i] = placement
+    return placements, max(rect.bottom for rect in placements)
+
+
+def pack_atlas(
+    sprites: list[Image.Image], bboxes: list[tuple[int, int, int, int]] | None = None
+) -> tuple[Image.Image, list[list[int]]]:
+    """Trim and pack sprites into the smallest atlas we find among a range of widths.
+
+    Arguments:
+        sprites (list[Image.Image]): The sprites to pack.
+        bboxes (list[tuple[int, int, int, int]] | None): Their alpha bounding boxes if already known.
+
+    Returns:
+        tuple: The atlas image and a frame per sprite, as [x, y, width, height, offset_x, offset_y] where the offset
+            is the position of the trimmed sprite inside the original one.
+
+    """
+    trimmed = [trim(sprite, bbox) for sprite, bbox in zip(sprites, bboxes or [None] * len(sprites), strict=True)]
+    sizes = [(image.width + PADDING, image.height + PADDING) for image, _, _ in trimmed]
+
+    area = sum(width * height for width, height in sizes)
+    min_width = max(*(width for width, _ in sizes), int(area**0.5))
+    best = None
+    # widths a bit above the square root of the total area tend to give the tightest atlases
+    for width in range(min_width, min_width * 3 // 2, max(8, min_width // 32)):
+        packed = _pack(sizes, width)
+        if packed and (best is None or width * packed[1] < best[0] * best[1][1]):
+            best = (width, packed)
+
+    width, (placements, height) = best
+    atlas = Image.new("RGBA", (width + -width % ALIGN, height + -height % ALIGN), (0, 0, 0, 0))
+    frames = []
+    for (image, offset_x, offset_y), rect in zip(trimmed, placements, strict=True):
+        atlas.paste(image, (rect.x, rect.y))
+        frames.append([rect.x, rect.y, image.width, image.height, offset_x, offset_y])
+    return atlas, frames
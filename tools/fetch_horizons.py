@@ -1,13 +1,16 @@
+import argparse
 import json
 import logging
 from datetime import UTC, datetime, timedelta
 from pathlib import Path
 
-from horizons_api import HorizonsClient, TimePeriod
+from horizons_api import BatchQuery, HorizonsClient, QueryKind, ResponseCache, TimePeriod, write_ephemeris
 
 # api access point
 HORIZONS_URL = "https://ssd.jpl.nasa.gov/api/horizons.api"
 HORIZONS_DATA_DIR = "horizons_data"
+CACHE_DIR = ".cache"
+EPHEMERIS_FILE = "ephemeris.bin"
 
 SUN_ID = 10
 
@@ -16,13 +19,35 @@ logging.basicConfig(level=logging.INFO)
 log = logging.getLogger(__name__)
 
 if __name__ == "__main__":
-    client = HorizonsClient()
+    parser = argparse.ArgumentParser(description="Fetch planet data from the JPL Horizons API")
+    parser.add_argument(
+        "--offline", action="store_true", help="Only replay previously cached responses, never use the network"
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Neither read nor store cached responses")
+    parser.add_argument("--workers", type=int, default=4, help="Number of concurrent queries (default: 4)")
+    parser.add_argument(
+        "--rate", type=float, default=5.0, help="Maximum network requests per second (default: 5)"
+    )
+    parser.add_argument(
+        "--ephemeris-days",
+        type=int,
+        default=0,
+        help=f"Also write planet positions for this many days from today to {EPHEMERIS_FILE} (default: 0, skip)",
+    )
+    parser.add_argument(
+        "--ephemeris-step", default="1d", help="Step size between ephemeris positions, e.g. 6h or 1d (default: 1d)"
+    )
+    args = parser.parse_args()
+
     # create dir for horizons API data if it doesn't already exist
     working_dir = Path.cwd()
     horizons_path = working_dir / HORIZONS_DATA_DIR
     if not horizons_path.exists():
         Path.mkdir(horizons_path, parents=True, exist_ok=True)
 
+    cache = None if args.no_cache else ResponseCache(horizons_path / CACHE_DIR)
+    client = HorizonsClient(cache=cache, offline=args.offline, requests_per_second=args.rate)
+
     with (horizons_path / "planets.json").open(encoding='utf-8') as f:
         template = json.load(f)
 
@@ -34,19 +59,41 @@ if __name__ == "__main__":
 
     today = datetime.now(tz=UTC)
     tomorrow = today + timedelta(days=1)
+    time_period = TimePeriod(start=today, end=tomorrow)
 
-    for planet in template:
-        id: int = planet["id"]
-        name: str = planet["name"]
-        time_period = TimePeriod(start=today, end=tomorrow)
+    # skip vectors for the sun since we don't need its position
+    planets = [planet for planet in template if planet["id"] != SUN_ID]
+    queries = [BatchQuery(planet["id"], QueryKind.OBJECT_DATA) for planet in planets]
+    queries += [BatchQuery(planet["id"], QueryKind.VECTORS, time_period) for planet in planets]
+    results = client.batch(queries, max_workers=args.workers)
+    object_data, positions = results[: len(planets)], results[len(planets) :]
 
-        object = client.get_object_data(id)
+    for planet, object in zip(planets, object_data, strict=True):
+        planet["info"] = object.text
 
-        if id == SUN_ID:
-            continue  # skip sun since we don't need its position
+    if args.ephemeris_days > 0:
+        ephemeris_period = TimePeriod(
+            start=today, end=today + timedelta(days=args.ephemeris_days), step=args.ephemeris_step
+        )
+        tables = client.batch(
+            [BatchQuery(planet["id"], QueryKind.VECTOR_TABLE, ephemeris_period) for planet in planets],
+            max_workers=args.workers,
+        )
+        write_ephemeris(
+            horizons_path / EPHEMERIS_FILE,
+            {planet["id"]: table for planet, table in zip(planets, tables, strict=True)},
+        )
+        log.info("Wrote %d epochs for %d planets to %s", len(tables[0]), len(planets), EPHEMERIS_FILE)
 
-        pos_response = client.get_vectors(id, time_period)
-        planet["info"] = object.text
+    client.close()
+    if client.timings:
+        log.info(
+            "%d requests: %.2fs connecting, %.2fs waiting for first byte, %.2fs transferring",
+            len(client.timings),
+            sum(timing.connect for timing in client.timings),
+            sum(timing.ttfb for timing in client.timings),
+            sum(timing.transfer for timing in client.timings),
+        )
 
     with(horizons_path / "planets.json").open("w", encoding='utf-8') as f:
         json.dump(template, f, indent=4)
@@ -1,3 +1,6 @@
+from .cache import *  # noqa: F403
 from .client import *  # noqa: F403
+from .ephemeris import *  # noqa: F403
 from .exceptions import *  # noqa: F403
 from .models import *  # noqa: F403
+from .transport import *  # noqa: F403
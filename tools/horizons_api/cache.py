@@ -0,0 +1,120 @@
+import hashlib
+import json
+import logging
+import tempfile
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import ClassVar, TextIO
+
+from .models import QueryKind
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+__all__ = ("ResponseCache",)
+
+DAY = 24 * 60 * 60
+
+
+class ResponseCache:
+    """A content-addressed on-disk cache of raw Horizons API responses.
+
+    Responses are stored under a hash of their normalized query parameters, so the same query always maps to the
+    same file regardless of parameter order or casing of the keys.
+    """
+
+    DEFAULT_TTLS: ClassVar[dict[QueryKind, float]] = {
+        QueryKind.MAJOR_BODIES: 30 * DAY,
+        QueryKind.OBJECT_DATA: 7 * DAY,
+        QueryKind.VECTORS: 1 * DAY,
+        QueryKind.VECTOR_TABLE: 1 * DAY,
+    }
+
+    def __init__(self, directory: Path, ttls: dict[QueryKind, float] | None = None) -> None:
+        """Create a cache rooted at the given directory.
+
+        Arguments:
+            directory (Path): Directory the cached responses are stored in, created if missing.
+            ttls (dict[QueryKind, float] | None): Time to live in seconds per query kind, overriding the defaults.
+
+        """
+        self.directory = directory
+        self.ttls = {**self.DEFAULT_TTLS, **(ttls or {})}
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(params: dict) -> str:
+        """Return the cache key for a set of query parameters."""
+        normalized = sorted((str(name).upper(), str(value).strip()) for name, value in params.items())
+        return hashlib.sha256(json.dumps(normalized).encode()).hexdigest()
+
+    def path_for(self, key: str) -> Path:
+        """Return the path a response with the given key is stored at."""
+        return self.directory / key[:2] / f"{key}.txt"
+
+    def get(self, params: dict, kind: QueryKind, *, ignore_ttl: bool = False) -> str | None:
+        """Get a cached response, or None if it is missing or expired.
+
+        Arguments:
+            params (dict): The query parameters of the request.
+            kind (QueryKind): The kind of query, which determines its time to live.
+            ignore_ttl (bool): Return the response even if it has expired.
+
+        Returns:
+            str | None: The cached response text.
+
+        """
+        f = self.open(params, kind, ignore_ttl=ignore_ttl)
+        if f is None:
+            return None
+        with f:
+            return f.read()
+
+    def open(self, params: dict, kind: QueryKind, *, ignore_ttl: bool = False) -> TextIO | None:
+        """Open a cached response for reading, or return None if it is missing or expired.
+
+        Takes the same arguments as get(), but lets a large response be read line by line.
+        """
+        path = self.path_for(self.key(params))
+        try:
+            age = time.time() - path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+        if not ignore_ttl and age > self.ttls[kind]:
+            logger.info("Cached %s response %s expired", kind, path.name)
+            return None
+
+        return path.open(encoding="utf-8")
+
+    def put(self, params: dict, text: str) -> None:
+        """Store a response, replacing any previous response for the same query atomically."""
+        with self.writer(params) as f:
+            f.write(text)
+
+    @contextmanager
+    def writer(self, params: dict) -> Iterator[TextIO]:
+        """Open a file to write a response into piece by piece.
+
+        The response only replaces the cached one once the block exits without an exception, so readers never see a
+        partially written response.
+        """
+        path = self.path_for(self.key(params))
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # write to a temporary file next to the target first, so the final rename is atomic
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=path.parent, delete=False) as f:
+            try:
+                yield f
+            except BaseException:
+                f.close()
+                Path(f.name).unlink()
+                raise
+        Path(f.name).replace(path)
+
+    def clear(self) -> None:
+        """Remove every cached response."""
+        for path in self.directory.glob("*/*.txt"):
+            path.unlink()
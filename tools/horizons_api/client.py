@@ -1,10 +1,28 @@
 import logging
+import random
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
 from pathlib import Path
-from urllib import parse, request
+from typing import TextIO
+from urllib import parse
 
-from .exceptions import HorizonsAPIError, ParsingError
-from .models import MajorBody, ObjectData, TimePeriod, VectorData
-from .parsers import MajorBodyTableParser, ObjectDataParser, VectorDataParser
+from .cache import ResponseCache
+from .exceptions import CacheMissError, HorizonsAPIError, ParsingError
+from .models import (
+    BatchQuery,
+    MajorBody,
+    ObjectData,
+    QueryKind,
+    RequestTiming,
+    TimePeriod,
+    VectorData,
+    VectorTable,
+)
+from .parsers import MajorBodyTableParser, ObjectDataParser, VectorDataParser, VectorTableParser
+from .transport import KeepAliveTransport, Transport
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -12,33 +30,129 @@ logger = logging.getLogger(__name__)
 __all__ = ("HorizonsClient",)
 
 
+class _RateLimiter:
+    """Spaces out calls to wait() across threads so they happen at most `rate` times per second."""
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1 / rate
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
 class HorizonsClient:
     """A client for the JPL Horizons API."""
 
     BASE_URL = "https://ssd.jpl.nasa.gov/api/horizons.api"
     TIME_FORMAT = "%Y-%m-%d"
 
-    def _request(self, params: dict, save_to: Path | None = None) -> str:
-        """Make a request to the Horizons API and return the result string."""
+    def __init__(
+        self,
+        transport: Transport | None = None,
+        cache: ResponseCache | None = None,
+        *,
+        base_url: str | None = None,
+        offline: bool = False,
+        requests_per_second: float | None = None,
+    ) -> None:
+        """Create a client.
+
+        Arguments:
+            transport (Transport | None): How responses are retrieved. Defaults to a KeepAliveTransport.
+            cache (ResponseCache | None): Optional cache that responses are read from and stored in.
+            base_url (str | None): Alternative API url, e.g. a local stub server.
+            offline (bool): Only replay responses from the cache, ignoring their expiry, and never use the network.
+            requests_per_second (float | None): Optional limit on network requests, shared by all threads.
+
+        """
+        if offline and cache is None:
+            msg = "Offline mode requires a response cache"
+            raise ValueError(msg)
+
+        self.transport = transport or KeepAliveTransport()
+        self.cache = cache
+        self.base_url = base_url or self.BASE_URL
+        self.offline = offline
+        self._rate_limiter = _RateLimiter(requests_per_second) if requests_per_second else None
+
+    def __enter__(self) -> "HorizonsClient":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close any connections held open by the transport."""
+        self.transport.close()
+
+    @property
+    def timings(self) -> list[RequestTiming]:
+        """Timing stats of every network request made so far."""
+        return self.transport.timings
+
+    @contextmanager
+    def _response(self, params: dict, kind: QueryKind, save_to: Path | None = None) -> Iterator[Iterator[str]]:
+        """Make a request to the Horizons API and give the with block its result line by line as it arrives.
+
+        Responses are streamed from the cache or the network without ever holding the whole text, while being
+        written to the cache and `save_to` along the way. The cached copy is only kept if the with block exits
+        without an exception, so a response the parser rejects isn't replayed until it expires.
+        """
         params["format"] = "text"
-        url = f"{self.BASE_URL}?{parse.urlencode(params)}"
-        logger.info("Horizons query from %s", url)
+        url = f"{self.base_url}?{parse.urlencode(params)}"
 
-        try:
-            with request.urlopen(url) as response:  # noqa: S310
-                data = response.read().decode()
+        cached = self.cache.open(params, kind, ignore_ttl=self.offline) if self.cache else None
+        if cached is None and self.offline:
+            msg = f"No cached response for {url} in offline mode"
+            raise CacheMissError(msg)
+
+        with ExitStack() as stack:
+            try:
+                if cached is not None:
+                    logger.info("Horizons query from cache for %s", url)
+                    lines = stack.enter_context(cached)
+                else:
+                    if self._rate_limiter:
+                        self._rate_limiter.wait()
+                    logger.info("Horizons query from %s", url)
+                    lines = self.transport.stream(url)
 
-            if save_to:
-                with Path.open(save_to, "w") as f:
-                    f.write(data)
+                copies = []
+                if cached is None and self.cache:
+                    copies.append(stack.enter_context(self.cache.writer(params)))
+                if save_to:
+                    copies.append(stack.enter_context(Path.open(save_to, "w")))
+            except Exception as e:
+                logger.exception("Horizon query raising %s", type(e).__name__)
+                msg = f"Failed to retrieve data from Horizons API: {e}"
+                raise HorizonsAPIError(msg) from e
 
+            stream = self._copy_lines(lines, copies)
+            yield stream
+            # parsers may stop before the end of the response, the copies should still get all of it
+            for _ in stream:
+                pass
+
+    @staticmethod
+    def _copy_lines(lines: Iterator[str], copies: list[TextIO]) -> Iterator[str]:
+        """Yield the lines of a response while writing them to the copies."""
+        try:
+            for line in lines:
+                for copy in copies:
+                    copy.write(line)
+                yield line
         except Exception as e:
             logger.exception("Horizon query raising %s", type(e).__name__)
             msg = f"Failed to retrieve data from Horizons API: {e}"
             raise HorizonsAPIError(msg) from e
 
-        return data
-
     def get_major_bodies(self, save_to: Path | None = None) -> list[MajorBody]:
         """Get a list of major bodies.
 
@@ -49,15 +163,16 @@ class HorizonsClient:
             list[MajorBody]: A list of major bodies.
 
         """
-        result_text = self._request(
+        with self._response(
             {
                 "COMMAND": "MB",
                 "OBJ_DATA": "YES",
                 "MAKE_EPHEM": "NO",
             },
+            QueryKind.MAJOR_BODIES,
             save_to=save_to,
-        )
-        return MajorBodyTableParser().parse(result_text)
+        ) as result_lines:
+            return MajorBodyTableParser().parse_lines(result_lines)
 
     def get_object_data(self, object_id: int, *, small_body: bool = False, save_to: Path | None = None) -> ObjectData:
         """Get physical data for a specific body.
@@ -71,16 +186,16 @@ class HorizonsClient:
             ObjectData: The physical data for the object.
 
         """
-        result_text = self._request(
+        with self._response(
             {
                 "COMMAND": str(object_id) + (";" if small_body else ""),
                 "OBJ_DATA": "YES",
                 "MAKE_EPHEM": "NO",
             },
+            QueryKind.OBJECT_DATA,
             save_to=save_to,
-        )
-
-        return ObjectDataParser().parse(result_text)
+        ) as result_lines:
+            return ObjectDataParser().parse("".join(result_lines))
 
     def get_vectors(
         self, object_id: int, time_options: TimePeriod, center: int = 10, save_to: Path | None = None
@@ -97,7 +212,7 @@ class HorizonsClient:
             VectorData: The positional vectors for the object.
 
         """
-        result_text = self._request(
+        with self._response(
             {
                 "COMMAND": str(object_id),
                 "OBJ_DATA": "NO",
@@ -108,12 +223,130 @@ class HorizonsClient:
                 "STOP_TIME": time_options.end.strftime(self.TIME_FORMAT),
                 "STEP_SIZE": time_options.step,
             },
+            QueryKind.VECTORS,
             save_to=save_to,
-        )
-
-        vector_data = VectorDataParser().parse(result_text)
-        if vector_data is None:
-            msg = "Failed to find all vector components in the text."
-            logger.warning(msg)
-            raise ParsingError(msg)
-        return vector_data
+        ) as result_lines:
+            vector_data = VectorDataParser().parse("".join(result_lines))
+            if vector_data is None:
+                msg = "Failed to find all vector components in the text."
+                logger.warning(msg)
+                raise ParsingError(msg)
+            return vector_data
+
+    def get_vector_table(
+        self,
+        object_id: int,
+        time_options: TimePeriod,
+        center: int = 10,
+        *,
+        velocities: bool = False,
+        save_to: Path | None = None,
+    ) -> VectorTable:
+        """Get positional vectors of a specific body for every step of a time period.
+
+        The response is parsed as it streams in, so long time periods with small steps don't need to fit in memory
+        as text.
+
+        Arguments:
+            object_id (int): The ID of the object.
+            time_options (TimePeriod): The time period and step size for the ephemeris.
+            center (int): The object id for center for the ephemeris. Default 10 for the sun.
+            velocities (bool): Whether to also get velocity vectors.
+            save_to (Path | None): Optional path to save the raw response data.
+
+        Returns:
+            VectorTable: The positional vectors for every epoch of the time period.
+
+        """
+        with self._response(
+            {
+                "COMMAND": str(object_id),
+                "OBJ_DATA": "NO",
+                "MAKE_EPHEM": "YES",
+                "EPHEM_TYPE": "VECTORS",
+                "VEC_TABLE": "2" if velocities else "1",
+                "CENTER": f"@{center}",
+                "START_TIME": time_options.start.strftime(self.TIME_FORMAT),
+                "STOP_TIME": time_options.end.strftime(self.TIME_FORMAT),
+                "STEP_SIZE": time_options.step,
+            },
+            QueryKind.VECTOR_TABLE,
+            save_to=save_to,
+        ) as result_lines:
+            return VectorTableParser(velocities=velocities).parse_lines(result_lines)
+
+    def batch(
+        self,
+        queries: list[BatchQuery],
+        *,
+        max_workers: int = 4,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        return_exceptions: bool = False,
+    ) -> list[list[MajorBody] | ObjectData | VectorData | VectorTable | Exception]:
+        """Run several queries concurrently.
+
+        Failed requests are retried with exponential backoff. Parsing errors and cache misses in offline mode are not
+        retried, since they would fail the same way again.
+
+        Arguments:
+            queries (list[BatchQuery]): The queries to run.
+            max_workers (int): Maximum number of queries in flight at once.
+            max_retries (int): How many times a failed request is retried before giving up.
+            backoff (float): Delay in seconds before the first retry, doubled for every further retry.
+            return_exceptions (bool): Return the exception of a failed query in place of its result instead of
+                raising it.
+
+        Returns:
+            list: The result of each query, in the same order as the queries.
+
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(self._run_with_retries, query, max_retries, backoff) for query in queries]
+
+            results = []
+            for future in futures:
+                exception = future.exception()
+                if exception is None:
+                    results.append(future.result())
+                elif return_exceptions:
+                    results.append(exception)
+                else:
+                    executor.shutdown(cancel_futures=True)
+                    raise exception
+            return results
+
+    def _run_with_retries(
+        self, query: BatchQuery, max_retries: int, backoff: float
+    ) -> list[MajorBody] | ObjectData | VectorData | VectorTable:
+        """Run a single batch query, retrying failed requests."""
+        attempt = 0
+        while True:
+            try:
+                return self._run_query(query)
+            except CacheMissError:
+                raise
+            except HorizonsAPIError:
+                if attempt >= max_retries:
+                    raise
+                delay = backoff * 2**attempt * random.uniform(0.5, 1.5)
+                logger.warning("Retrying query for %s in %.1fs", query.object_id, delay)
+                time.sleep(delay)
+                attempt += 1
+
+    def _run_query(self, query: BatchQuery) -> list[MajorBody] | ObjectData | VectorData | VectorTable:
+        """Dispatch a batch query to the matching getter."""
+        match query.kind:
+            case QueryKind.MAJOR_BODIES:
+                return self.get_major_bodies()
+            case QueryKind.OBJECT_DATA:
+                return self.get_object_data(query.object_id, small_body=query.small_body)
+            case QueryKind.VECTORS | QueryKind.VECTOR_TABLE if query.time_options is None:
+                msg = "Vector queries require time options"
+                raise ValueError(msg)
+            case QueryKind.VECTORS:
+                return self.get_vectors(query.object_id, query.time_options, query.center)
+            case QueryKind.VECTOR_TABLE:
+                return self.get_vector_table(
+                    query.object_id, query.time_options, query.center, velocities=query.velocities
+                )
@@ -0,0 +1,162 @@
+import bisect
+import mmap
+import struct
+import sys
+import tempfile
+from array import array
+from datetime import datetime
+from pathlib import Path
+
+from .models import VectorData, VectorTable
+
+__all__ = ("EphemerisStore", "julian_date", "write_ephemeris")
+
+"""
+Layout of an ephemeris file, all values little-endian:
+
+    header      magic b"HEPH", format version (uint16), reserved (uint16), body count (uint32), epoch count (uint32)
+    body ids    int32 per body, padded with zeros to a multiple of 8 bytes
+    times       float64 per epoch, Julian dates shared by all bodies
+    positions   for every body in the order of the ids, its x, y and z columns of float64 per epoch
+
+Every column sits at an offset that follows from the header alone, so a reader can map the file and index into it
+without parsing anything.
+"""
+
+MAGIC = b"HEPH"
+VERSION = 1
+HEADER = struct.Struct("<4sHHII")
+FLOAT_SIZE = 8
+UNIX_EPOCH_JD = 2440587.5
+
+
+def julian_date(moment: datetime) -> float:
+    """Convert an aware datetime to a Julian date, the time scale used by Horizons ephemerides."""
+    return moment.timestamp() / 86400 + UNIX_EPOCH_JD
+
+
+def _check_byteorder() -> None:
+    # the float columns are written and read in native byte order through array and memoryview
+    if sys.byteorder != "little":
+        msg = "Ephemeris files can only be used on little-endian machines"
+        raise RuntimeError(msg)
+
+
+def _padded_ids_size(body_count: int) -> int:
+    size = body_count * 4
+    return size + -size % FLOAT_SIZE
+
+
+def write_ephemeris(path: Path, tables: dict[int, VectorTable]) -> None:
+    """Write the vector tables of several bodies into a single ephemeris file, replacing it atomically.
+
+    Arguments:
+        path (Path): Where to write the file.
+        tables (dict[int, VectorTable]): Vector tables by body id, which must all share the same epochs.
+
+    """
+    _check_byteorder()
+    if not tables:
+        msg = "Cannot write an ephemeris without any bodies"
+        raise ValueError(msg)
+
+    times = next(iter(tables.values())).time
+    if any(table.time != times for table in tables.values()):
+        msg = "All vector tables of an ephemeris must share the same epochs"
+        raise ValueError(msg)
+
+    ids = array("i", tables).tobytes()
+    with tempfile.NamedTemporaryFile("wb", dir=path.parent, delete=False) as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(tables), len(times)))
+        f.write(ids.ljust(_padded_ids_size(len(tables)), b"\0"))
+        f.write(times.tobytes())
+        for table in tables.values():
+            f.write(table.x.tobytes())
+            f.write(table.y.tobytes())
+            f.write(table.z.tobytes())
+    Path(f.name).replace(path)
+
+
+class EphemerisStore:
+    """Memory-mapped reader for ephemeris files written by write_ephemeris.
+
+    Opening a store only reads the header and body ids, so it takes the same time no matter how many epochs the file
+    holds. Positions are read straight out of the mapped columns when they are asked for.
+    """
+
+    def __init__(self, path: Path) -> None:
+        _check_byteorder()
+        with path.open("rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, body_count, epoch_count = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            msg = f"{path} is not a version {VERSION} ephemeris file"
+            raise ValueError(msg)
+
+        self._view = memoryview(self._map)
+        ids_end = HEADER.size + body_count * 4
+        self.body_ids: list[int] = self._view[HEADER.size : ids_end].cast("i").tolist()
+        self._index = {body_id: i for i, body_id in enumerate(self.body_ids)}
+
+        times_start = HEADER.size + _padded_ids_size(body_count)
+        self.epoch_count = epoch_count
+        self.times = self._column(times_start)
+        self._positions_start = times_start + epoch_count * FLOAT_SIZE
+
+    def __enter__(self) -> "EphemerisStore":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.epoch_count
+
+    def close(self) -> None:
+        """Unmap the file. Any columns handed out by columns() have to be released first."""
+        self.times.release()
+        self._view.release()
+        self._map.close()
+
+    def _column(self, start: int) -> memoryview:
+        return self._view[start : start + self.epoch_count * FLOAT_SIZE].cast("d")
+
+    def columns(self, body_id: int) -> tuple[memoryview, memoryview, memoryview]:
+        """Get the x, y and z columns of a body as zero-copy float views into the file."""
+        column_size = self.epoch_count * FLOAT_SIZE
+        start = self._positions_start + self._index[body_id] * 3 * column_size
+        return self._column(start), self._column(start + column_size), self._column(start + 2 * column_size)
+
+    def position_at_index(self, body_id: int, index: int) -> VectorData:
+        """Get the position of a body at one of the stored epochs."""
+        x, y, z = self.columns(body_id)
+        return VectorData(x=x[index], y=y[index], z=z[index])
+
+    def position_at(self, body_id: int, time: float) -> VectorData:
+        """Get the position of a body at any time within the stored epochs, interpolating linearly between them.
+
+        Arguments:
+            body_id (int): The ID of the body.
+            time (float): The Julian date, see julian_date().
+
+        Returns:
+            VectorData: The interpolated position.
+
+        """
+        if not self.epoch_count or not self.times[0] <= time <= self.times[-1]:
+            msg = f"Time {time} is outside of the stored epochs"
+            raise ValueError(msg)
+
+        right = min(bisect.bisect_right(self.times, time), self.epoch_count - 1)
+        left = max(right - 1, 0)
+        span = self.times[right] - self.times[left]
+        weight = (time - self.times[left]) / span if span else 0.0
+
+        x, y, z = self.columns(body_id)
+        return VectorData(
+            x=x[left] + (x[right] - x[left]) * weight,
+            y=y[left] + (y[right] - y[left]) * weight,
+            z=z[left] + (z[right] - z[left]) * weight,
+        )
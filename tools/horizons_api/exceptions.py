@@ -1,9 +1,13 @@
-__all__ = ("HorizonsAPIError", "ParsingError")
+__all__ = ("CacheMissError", "HorizonsAPIError", "ParsingError")
 
 
 class HorizonsAPIError(Exception):
     """Base exception for Horizons API errors."""
 
 
+class CacheMissError(HorizonsAPIError):
+    """Raised in offline mode when a response isn't in the cache, retrying can't help."""
+
+
 class ParsingError(Exception):
     """Base exception for parsing errors."""
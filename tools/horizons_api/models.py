@@ -1,14 +1,29 @@
-from dataclasses import dataclass
+from array import array
+from dataclasses import dataclass, field
 from datetime import datetime
+from enum import StrEnum
 
 __all__ = (
+    "BatchQuery",
     "MajorBody",
     "ObjectData",
+    "QueryKind",
+    "RequestTiming",
     "TimePeriod",
     "VectorData",
+    "VectorTable",
 )
 
 
+class QueryKind(StrEnum):
+    """The kinds of queries the client sends to the Horizons API."""
+
+    MAJOR_BODIES = "major_bodies"
+    OBJECT_DATA = "object_data"
+    VECTORS = "vectors"
+    VECTOR_TABLE = "vector_table"
+
+
 @dataclass
 class MajorBody:
     """Represents a major body in the solar system."""
@@ -36,6 +51,34 @@ class VectorData:
     z: float | None = None
 
 
+@dataclass
+class VectorTable:
+    """Represents position and optionally velocity vectors for every epoch of an ephemeris, stored as columns.
+
+    Times are Julian dates (TDB) as reported by Horizons. The velocity columns are empty unless velocities were
+    requested.
+    """
+
+    time: array = field(default_factory=lambda: array("d"))
+    x: array = field(default_factory=lambda: array("d"))
+    y: array = field(default_factory=lambda: array("d"))
+    z: array = field(default_factory=lambda: array("d"))
+    vx: array = field(default_factory=lambda: array("d"))
+    vy: array = field(default_factory=lambda: array("d"))
+    vz: array = field(default_factory=lambda: array("d"))
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def __getitem__(self, index: int) -> VectorData:
+        return VectorData(x=self.x[index], y=self.y[index], z=self.z[index])
+
+    @property
+    def has_velocities(self) -> bool:
+        """Whether the table holds a velocity for every epoch."""
+        return len(self.vx) == len(self.time) > 0
+
+
 @dataclass
 class TimePeriod:
     """Represents a time period for ephemeris data."""
@@ -43,3 +86,32 @@ class TimePeriod:
     start: datetime
     end: datetime
     step: str = "2d"
+
+
+@dataclass
+class BatchQuery:
+    """Represents a single query of a batch request."""
+
+    object_id: int
+    kind: QueryKind
+    time_options: TimePeriod | None = None
+    small_body: bool = False
+    center: int = 10
+    velocities: bool = False
+
+
+@dataclass
+class RequestTiming:
+    """Represents where the time of a single network request went, in seconds."""
+
+    url: str
+    connect: float
+    ttfb: float
+    transfer: float
+    size: int
+    reused_connection: bool
+
+    @property
+    def total(self) -> float:
+        """Total duration of the request."""
+        return self.connect + self.ttfb + self.transfer
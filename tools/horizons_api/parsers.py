@@ -1,9 +1,11 @@
 import logging
 import re
 from abc import ABC, abstractmethod
+from array import array
+from collections.abc import Iterable
 
 from .exceptions import ParsingError
-from .models import MajorBody, ObjectData, VectorData
+from .models import MajorBody, ObjectData, VectorData, VectorTable
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -24,11 +26,6 @@ class MajorBodyTableParser(BaseParser):
     def parse(self, text: str) -> list[MajorBody]:
         """Parse the text output from the NASA/JPL Horizons API into a list of objects.
 
-        This function orchestrates the parsing process by calling helper methods to:
-        1. Find the data section.
-        2. Determine column boundaries.
-        3. Parse each data row individually.
-
         Arguments:
             text: The multi-line string data from the Horizons API.
 
@@ -36,51 +33,45 @@ class MajorBodyTableParser(BaseParser):
             A list of MajorBody objects.
 
         """
-        lines = text.strip().split("\n")
+        return self.parse_lines(text.strip().split("\n"))
 
-        separator_line_index = self._find_separator_index(lines)
-        if separator_line_index is None:
-            logger.warning("Could not find header or separator line. Unable to parse.")
-            return []
-        data_start_index = separator_line_index + 1
-        data_end_index = self._find_data_end_index(lines, data_start_index)
-        column_boundaries = self._get_column_boundaries(lines[separator_line_index])
-        if not column_boundaries:
-            logger.warning("Could not determine column boundaries. Parsing may be incomplete.")
-            return []
+    def parse_lines(self, lines: Iterable[str]) -> list[MajorBody]:
+        """Parse the table in a single pass over the lines of a response, without holding the whole text.
 
-        data_lines = lines[data_start_index:data_end_index]
+        The header line is followed directly by a separator line made of dash groups that determine the column
+        boundaries, and the data rows run from there up to the first blank line.
 
-        parsed_objects = []
-        for line in data_lines:
-            body = self._parse_row(line, column_boundaries)
-            if body:
-                parsed_objects.append(body)
-
-        return parsed_objects
-
-    def _find_separator_index(self, lines: list[str]) -> int | None:
-        """Find the separator line and the starting index of the data rows."""
-        header_line_index = -1
-        separator_line_index = -1
-        for i, line in enumerate(lines):
-            if "ID#" in line and "Name" in line:
-                header_line_index = i
-            if "---" in line and header_line_index != -1:
-                separator_line_index = i
-                break
-
-        if separator_line_index == -1 or header_line_index + 1 != separator_line_index:
-            return None
+        Arguments:
+            lines: The lines of the response, with or without line endings.
 
-        return separator_line_index
+        Returns:
+            A list of MajorBody objects.
 
-    def _find_data_end_index(self, lines: list[str], start_index: int) -> int:
-        """Find the end index of the data rows."""
-        for i in range(start_index, len(lines)):
-            if not lines[i].strip():
-                return i
-        return len(lines)
+        """
+        parsed_objects = []
+        column_boundaries = None
+        previous_was_header = False
+
+        for raw_line in lines:
+            line = raw_line.rstrip("\r\n")
+            if column_boundaries is None:
+                if previous_was_header and "---" in line:
+                    column_boundaries = self._get_column_boundaries(line)
+                    if not column_boundaries:
+                        logger.warning("Could not determine column boundaries. Parsing may be incomplete.")
+                        return []
+                previous_was_header = "ID#" in line and "Name" in line
+            elif not line.strip():
+                # the table ends at the first blank line, but keep consuming so a streamed response is read fully
+                column_boundaries = []
+            elif column_boundaries:
+                body = self._parse_row(line, column_boundaries)
+                if body:
+                    parsed_objects.append(body)
+
+        if column_boundaries is None:
+            logger.warning("Could not find header or separator line. Unable to parse.")
+        return parsed_objects
 
     def _get_column_boundaries(self, separator_line: str) -> list[tuple[int, int]] | None:
         """Determine column boundaries from the separator line using its dash groups."""
@@ -132,3 +123,74 @@ class VectorDataParser(BaseParser):
             raise ParsingError(msg)
 
         return VectorData(x=float(x_match.group(1)), y=float(y_match.group(1)), z=float(z_match.group(1)))
+
+
+class VectorTableParser(BaseParser):
+    """Parses every epoch of a vector ephemeris into columns.
+
+    The ephemeris lies between the `$$SOE` and `$$EOE` markers, where each epoch starts with a line holding its
+    Julian date followed by lines of components, e.g.
+
+        2460000.500000000 = A.D. 2023-Feb-24 00:00:00.0000 TDB
+         X =-1.378E+08 Y = 5.607E+07 Z =-3.116E+03
+         VX=-1.173E+01 VY=-2.777E+01 VZ= 2.030E-03
+    """
+
+    EPOCH_PATTERN = re.compile(r"^\s*(\d+\.\d+)\s*=")
+    COMPONENT_PATTERN = re.compile(r"\b(VX|VY|VZ|X|Y|Z)\s*=\s*(-?[\d\.]+E[\+-]\d+)")
+
+    def __init__(self, *, velocities: bool = False) -> None:
+        self.velocities = velocities
+
+    def parse(self, text: str) -> VectorTable:
+        """Parse the text to find the vectors of every epoch."""
+        return self.parse_lines(text.splitlines())
+
+    def parse_lines(self, lines: Iterable[str]) -> VectorTable:
+        """Parse the vectors of every epoch in a single pass over the lines of a response.
+
+        Arguments:
+            lines: The lines of the response, with or without line endings.
+
+        Returns:
+            A VectorTable with a row per epoch.
+
+        """
+        table = VectorTable()
+        columns = {"X": table.x, "Y": table.y, "Z": table.z}
+        if self.velocities:
+            columns |= {"VX": table.vx, "VY": table.vy, "VZ": table.vz}
+
+        in_ephemeris = found_ephemeris = False
+        for line in lines:
+            # everything outside the markers is still consumed, so a streamed response is read completely
+            if not in_ephemeris:
+                if line.startswith("$$SOE") and not found_ephemeris:
+                    in_ephemeris = found_ephemeris = True
+                continue
+            if line.startswith("$$EOE"):
+                in_ephemeris = False
+                continue
+
+            self._parse_ephemeris_line(line, table, columns)
+
+        if not found_ephemeris:
+            msg = "Failed to find the $$SOE marker of the ephemeris in the text."
+            logger.warning(msg)
+            raise ParsingError(msg)
+        if any(len(column) != len(table.time) for column in columns.values()):
+            msg = "Failed to find all vector components for every epoch in the text."
+            logger.warning(msg)
+            raise ParsingError(msg)
+
+        return table
+
+    def _parse_ephemeris_line(self, line: str, table: VectorTable, columns: dict[str, array]) -> None:
+        """Append the epoch or vector components found on a line of the ephemeris to their columns."""
+        epoch_match = self.EPOCH_PATTERN.match(line)
+        if epoch_match:
+            table.time.append(float(epoch_match.group(1)))
+            return
+        for name, value in self.COMPONENT_PATTERN.findall(line):
+            if name in columns:
+                columns[name].append(float(value))
@@ -0,0 +1,218 @@
+import codecs
+import http.client
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from pathlib import Path
+from urllib import parse, request
+
+from .cache import ResponseCache
+from .exceptions import HorizonsAPIError
+from .models import RequestTiming
+
+__all__ = ("FixtureTransport", "KeepAliveTransport", "Transport", "UrllibTransport")
+
+
+class Transport(ABC):
+    """Abstract base class for the ways the client can retrieve a response."""
+
+    def __init__(self) -> None:
+        # transports that go over the network record how long each request took here
+        self.timings: list[RequestTiming] = []
+
+    @abstractmethod
+    def stream(self, url: str) -> Iterator[str]:
+        """Retrieve the response body for the given url line by line, keeping line endings."""
+        raise NotImplementedError
+
+    def fetch(self, url: str) -> str:
+        """Retrieve the whole response body for the given url."""
+        return "".join(self.stream(url))
+
+    def close(self) -> None:  # noqa: B027
+        """Release any resources held by the transport."""
+
+
+class UrllibTransport(Transport):
+    """Retrieve responses over the network with urllib, opening a new connection per request."""
+
+    def __init__(self, timeout: float = 60.0) -> None:
+        super().__init__()
+        self.timeout = timeout
+
+    def stream(self, url: str) -> Iterator[str]:
+        """Retrieve the response body for the given url line by line."""
+        with request.urlopen(url, timeout=self.timeout) as response:  # noqa: S310
+            for line in response:
+                yield line.decode()
+
+
+class KeepAliveTransport(Transport):
+    """Retrieve responses over persistent HTTP/1.1 connections that are reused for later requests to the same host.
+
+    Idle connections are pooled per host, so concurrent requests from a batch each check out their own connection
+    and return it once the response has been read. Responses are requested gzip compressed and are read in chunks,
+    failing once the decoded body grows past `max_bytes`.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+    # errors raised when the server already closed a connection we kept around
+    STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+    def __init__(self, timeout: float = 60.0, max_bytes: int = 64 * 1024 * 1024, max_idle_per_host: int = 8) -> None:
+        super().__init__()
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.max_idle_per_host = max_idle_per_host
+        self._idle: dict[tuple[str, str], list[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def stream(self, url: str) -> Iterator[str]:
+        """Retrieve the response body for the given url line by line.
+
+        The connection only goes back into the pool once the body has been read completely, so a caller that
+        stops iterating early closes the connection instead.
+        """
+        parts = parse.urlsplit(url)
+        host_key = (parts.scheme, parts.netloc)
+        target = f"{parts.path or '/'}?{parts.query}" if parts.query else parts.path or "/"
+
+        connection = self._checkout(host_key)
+        reused = connection.sock is not None
+        try:
+            try:
+                response, connect_time, ttfb = self._send(connection, target)
+            except self.STALE_CONNECTION_ERRORS:
+                if not reused:
+                    raise
+                # the server closed the idle connection, try once more on a fresh one
+                connection.close()
+                reused = False
+                response, connect_time, ttfb = self._send(connection, target)
+
+            first_byte = time.perf_counter()
+            size = 0
+            for line in self._iter_lines(response):
+                size += len(line)
+                yield line
+            transfer = time.perf_counter() - first_byte
+        except BaseException:
+            connection.close()
+            raise
+
+        if response.will_close:
+            connection.close()
+        else:
+            self._checkin(host_key, connection)
+
+        timing = RequestTiming(url, connect_time, ttfb, transfer, size, reused_connection=reused)
+        with self._lock:
+            self.timings.append(timing)
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+    def _checkout(self, host_key: tuple[str, str]) -> http.client.HTTPConnection:
+        """Take an idle connection to the host out of the pool, or create a new one."""
+        with self._lock:
+            connections = self._idle.get(host_key)
+            if connections:
+                return connections.pop()
+
+        scheme, netloc = host_key
+        if scheme == "https":
+            return http.client.HTTPSConnection(netloc, timeout=self.timeout)
+        return http.client.HTTPConnection(netloc, timeout=self.timeout)
+
+    def _checkin(self, host_key: tuple[str, str], connection: http.client.HTTPConnection) -> None:
+        """Return a connection to the pool so later requests can reuse it."""
+        with self._lock:
+            connections = self._idle.setdefault(host_key, [])
+            if len(connections) < self.max_idle_per_host:
+                connections.append(connection)
+                return
+        connection.close()
+
+    def _send(
+        self, connection: http.client.HTTPConnection, target: str
+    ) -> tuple[http.client.HTTPResponse, float, float]:
+        """Send a request, connecting first if needed, and wait for the response headers.
+
+        Returns:
+            tuple: The response, the time spent connecting and the time spent waiting for the first byte.
+
+        """
+        start = time.perf_counter()
+        if connection.sock is None:
+            connection.connect()
+        connected = time.perf_counter()
+
+        connection.request("GET", target, headers={"Accept-Encoding": "gzip", "Connection": "keep-alive"})
+        response = connection.getresponse()
+        if response.status != http.HTTPStatus.OK:
+            msg = f"HTTP {response.status} {response.reason} for {target}"
+            raise HorizonsAPIError(msg)
+
+        return response, connected - start, time.perf_counter() - connected
+
+    def _iter_lines(self, response: http.client.HTTPResponse) -> Iterator[str]:
+        """Read, decompress and decode the response body in chunks, yielding complete lines."""
+        pending = ""
+        for text in self._iter_text(response):
+            lines = (pending + text).splitlines(keepends=True)
+            # the last piece might be cut off in the middle of a line, so hold it back until the next chunk
+            pending = lines.pop() if lines and not lines[-1].endswith("\n") else ""
+            yield from lines
+        if pending:
+            yield pending
+
+    def _iter_text(self, response: http.client.HTTPResponse) -> Iterator[str]:
+        """Read the response body in chunks, enforcing the size cap, and yield it as decoded text."""
+        decompressor = None
+        if response.getheader("Content-Encoding", "").lower() == "gzip":
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        decoder = codecs.getincrementaldecoder("utf-8")()
+
+        size = 0
+        while chunk := response.read(self.CHUNK_SIZE):
+            if decompressor:
+                # cap the decompressed output so a small compressed response can't expand past max_bytes
+                chunk = decompressor.decompress(chunk, self.max_bytes - size + 1)
+            size += len(chunk)
+            if size > self.max_bytes:
+                msg = f"Response exceeds the maximum size of {self.max_bytes} bytes"
+                raise HorizonsAPIError(msg)
+            yield decoder.decode(chunk)
+
+        tail = decompressor.flush() if decompressor else b""
+        yield decoder.decode(tail, final=True)
+
+
+class FixtureTransport(Transport):
+    """Replay recorded responses from a directory instead of using the network.
+
+    Fixture files are named after the cache key of their query parameters, e.g. `<key>.txt`, so a fixture can be
+    recorded by copying a file out of a ResponseCache directory.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        super().__init__()
+        self.directory = directory
+
+    def stream(self, url: str) -> Iterator[str]:
+        """Retrieve the recorded response for the query parameters of the given url line by line."""
+        params = dict(parse.parse_qsl(parse.urlsplit(url).query))
+        path = self.directory / f"{ResponseCache.key(params)}.txt"
+        if not path.exists():
+            msg = f"No recorded response for {url} in {self.directory}"
+            raise HorizonsAPIError(msg)
+
+        with path.open(encoding="utf-8") as f:
+            yield from f
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Transcode the game audio into lower bitrate Opus tiers, for players on slow or metered connections.
+
+Every file in static/audio is encoded once per tier into static/audio/tiers/<name>.<tier>.ogg, with music and sound
+effects getting their own bitrates since short effects stay intelligible at much lower rates than music does.
+static/audio/tiers/manifest.json lists the duration and size of every file and its tiers, app.py hands it to the
+AudioHandler which picks a tier for music and one for effects from the connection the browser reports.
+
+Needs ffmpeg (built with libopus) and ffprobe on the PATH.
+
+    python tools/make_audio_tiers.py            # transcode whatever changed
+    python tools/make_audio_tiers.py --force    # transcode everything
+"""
+
+import argparse
+import json
+import logging
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+WORKING_DIR = Path(__file__).parent.parent
+AUDIO_DIR = WORKING_DIR / "static" / "audio"
+TIERS_DIR = AUDIO_DIR / "tiers"
+MANIFEST_FILE = TIERS_DIR / "manifest.json"
+
+# kbps per tier, the untouched original file is the implicit "full" tier above these
+TIER_BITRATES = {
+    "music": {"low": 24, "medium": 64},
+    "sfx": {"low": 16, "medium": 32},
+}
+MUSIC_FILES = {"music_main.ogg", "music_thematic.ogg", "death.ogg"}
+
+
+def probe_duration(path: Path) -> float:
+    """Get the duration of an audio file in seconds."""
+    output = subprocess.run(  # noqa: S603
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", str(path)],  # noqa: S607
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return round(float(output.strip()), 3)
+
+
+def transcode(source: Path, target: Path, bitrate: int) -> None:
+    """Encode a file as Opus at the given bitrate, replacing the target atomically."""
+    with tempfile.NamedTemporaryFile(dir=target.parent, suffix=target.suffix, delete=False) as f:
+        temp_path = Path(f.name)
+    try:
+        subprocess.run(  # noqa: S603
+            [  # noqa: S607
+                "ffmpeg", "-v", "error", "-y", "-i", str(source),
+                "-vn", "-c:a", "libopus", "-b:a", f"{bitrate}k", "-vbr", "on", "-application", "audio",
+                str(temp_path),
+            ],
+            check=True,
+        )  # fmt: skip
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    temp_path.chmod(0o644)
+    temp_path.replace(target)
+
+
+def build_tiers(*, force: bool = False) -> dict:
+    """Transcode every audio file into its tiers and return the manifest describing them."""
+    previous = json.loads(MANIFEST_FILE.read_text(encoding="utf-8")) if MANIFEST_FILE.exists() else {}
+    tracks = {}
+    for source in sorted(AUDIO_DIR.glob("*.ogg")):
+        kind = "music" if source.name in MUSIC_FILES else "sfx"
+        size = source.stat().st_size
+        old = previous.get("tracks", {}).get(source.name)
+
+        tiers = {}
+        for tier, bitrate in TIER_BITRATES[kind].items():
+            target = TIERS_DIR / f"{source.stem}.{tier}.ogg"
+            # the source size and the bitrate are cheap stand-ins for a content hash of the inputs
+            unchanged = old and old["size"] == size and old["tiers"].get(tier, {}).get("bitrate") == bitrate
+            if force or not unchanged or not target.exists():
+                log.info("Encoding %s at %d kbps", source.name, bitrate)
+                transcode(source, target, bitrate)
+            tiers[tier] = {"file": f"tiers/{target.name}", "bitrate": bitrate, "size": target.stat().st_size}
+
+        tracks[source.name] = {"kind": kind, "duration": probe_duration(source), "size": size, "tiers": tiers}
+    return {"tracks": tracks}
+
+
+def main() -> int:
+    """Build the tiers, write the manifest and print how much each tier saves."""
+    parser = argparse.ArgumentParser(description="Transcode the game audio into bitrate tiers")
+    parser.add_argument("--force", action="store_true", help="Transcode files even if they're unchanged")
+    args = parser.parse_args()
+
+    if not shutil.which("ffmpeg") or not shutil.which("ffprobe"):
+        log.error("ffmpeg and ffprobe need to be installed to transcode the audio")
+        return 1
+
+    TIERS_DIR.mkdir(exist_ok=True)
+    manifest = build_tiers(force=args.force)
+    MANIFEST_FILE.write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+
+    for kind, bitrates in TIER_BITRATES.items():
+        tracks = [track for track in manifest["tracks"].values() if track["kind"] == kind]
+        full = sum(track["size"] for track in tracks)
+        sizes = ", ".join(
+            f"{tier} {sum(track['tiers'][tier]['size'] for track in tracks) / 1024:.0f} KB" for tier in bitrates
+        )
+        print(f"{kind}: full {full / 1024:.0f} KB, {sizes}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
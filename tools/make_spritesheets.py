@@ -1,74 +1,355 @@
-"""
-just a quick and dirty script to turn a series of 50 .png sprites into a single spritesheet file. We're not
-using this otherwise and we may well not need it again, but this can live here just in case we generate more
-planet sprites on that website
+"""Build all of our spritesheets in one go.
+
+-   a horizontal strip per planet out of its 50 frames in "tools/<planet> sprites", frames we generated on a
+    website and don't keep in the repo
+-   the asteroid atlas out of "static/sprites/asteroid sprites", plus the items cut out of recycle_items.png by
+    process_recycle_sprites.py, packed by atlas.py with its frames listed in "static/sprites/asteroids.json"
+-   a bitmap font atlas of a monospace font at the sizes the game draws text at, packed by atlas.py with the
+    glyph frames and font metrics in "static/sprites/font.json", which bitmapfont.py draws text from
+-   downscaled mip levels of the planet and asteroid sheets, "<name>_lod1.png" at half size, "<name>_lod2.png" at a
+    quarter and so on down to frames of about MIN_LOD_FRAME_SIZE pixels, which the game draws from when a sprite is
+    small
+-   smaller encodings of every image in static/sprites in "static/sprites/variants": lossless WebP, AVIF and a
+    256 colour palette PNG. Variants are only kept when they come out smaller, and the palette PNG only when the
+    image has few enough colours for it to be lossless, while AVIF is lossy and has to stay above MIN_VARIANT_PSNR.
+    app.py then serves the smallest one the browser accepts under the original .png name. The variants are build
+    output and not kept in the repo, so run this before deploying
+
+Each sheet is only rebuilt when the hash of its input files (or of these scripts) changed since the last build, and
+the sheets that do need building are built in parallel in a process pool, so a full rebuild takes about as long as
+the slowest sheet. Outputs are written to a temporary file first and then renamed, so the game never sees a half
+written sheet.
+
+    python tools/make_spritesheets.py              # build whatever changed
+    python tools/make_spritesheets.py --force      # rebuild everything
+    python tools/make_spritesheets.py asteroids    # only consider some of the sheets
 """
 
-import os
+import argparse
+import hashlib
+import json
+import math
+import string
+import tempfile
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO
 from pathlib import Path
 
 import numpy as np
-from PIL import Image
+from atlas import pack_atlas
+from PIL import Image, ImageDraw, ImageFont, features
+from process_recycle_sprites import extract_recycle_sprites, resize_with_padding, sprite_stats
 
 cur_dir = Path(__file__).resolve().parent
+sprites_dir = cur_dir.parent / "static" / "sprites"
+asteroid_dir = sprites_dir / "asteroid sprites"
+variants_dir = sprites_dir / "variants"
+
+# remembers the input hash each sheet was last built from
+BUILD_STATE_FILE = cur_dir / ".spritesheet_hashes.json"
+
+PLANETS = ["earth", "jupiter", "mars", "mercury", "neptune", "saturn", "sun", "uranus", "venus"]
+PLANET_FRAMES = 50
+ASTEROID_CELL_SIZE = 100
+RECYCLE_SHEET = "recycle_items.png"
+MIN_LOD_FRAME_SIZE = 16
+# in dB, above 40 the difference is generally not visible
+MIN_VARIANT_PSNR = 40.0
+AVIF_QUALITY = 90
+
+# the game asks for Courier New, which we can't redistribute in any form. The first of these that exists gets baked
+FONT_FILES = [
+    cur_dir / "fonts" / "font.ttf",
+    Path("/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf"),
+    Path("/Library/Fonts/Courier New.ttf"),
+    Path("C:/Windows/Fonts/cour.ttf"),
+]
+# pixel sizes of the overlay text (12 to 20px depending on the window size) and the fixed size labels
+FONT_SIZES = list(range(12, 21))
+FONT_CHARS = string.digits + string.ascii_letters + string.punctuation + " "
+# room around each glyph for the ones that reach past their advance, like j and W
+GLYPH_MARGIN = 2
+
 
-# Planet spritesheets
-for planet in "earth jupiter mars mercury neptune saturn sun uranus venus".split():
+def hash_inputs(paths: list[Path]) -> str:
+    """Hash the names and contents of the given files, along with the build scripts themselves."""
+    digest = hashlib.sha256()
+    for path in [Path(__file__), cur_dir / "process_recycle_sprites.py", cur_dir / "atlas.py", *paths]:
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def save_atomic(image: Image.Image, path: Path) -> None:
+    """Save an image by writing a temporary file next to it and renaming that over the target."""
+    buffer = BytesIO()
+    image.save(buffer, format=Image.registered_extensions()[path.suffix], optimize=True)
+    write_atomic(path, buffer.getvalue())
+
+
+def write_atomic(path: Path, data: str | bytes) -> None:
+    """Write a file the same way as save_atomic."""
+    mode = "w" if isinstance(data, str) else "wb"
+    with tempfile.NamedTemporaryFile(mode, dir=path.parent, suffix=path.suffix, delete=False) as f:
+        f.write(data)
+    # temporary files are only readable by us, the served files need the usual permissions
+    Path(f.name).chmod(0o644)
+    Path(f.name).replace(path)
+
+
+def planet_frame_paths(planet: str) -> list[Path]:
+    """Paths of the frames of a planet, in animation order."""
     planet_dir = cur_dir / f"{planet} sprites"
-    if planet_dir.exists():
-        first_frame = Image.open(planet_dir / "sprite_1.png")
-        width, height = first_frame.size
-        spritesheet = Image.new("RGBA", (width * 50, height), (0, 0, 0, 0))
-        for fr in range(1, 51):
-            frame = Image.open(planet_dir / f"sprite_{fr}.png")
-            spritesheet.paste(frame, (width * (fr - 1), 0))
-
-        spritesheet.save(cur_dir.parent / "static" / "sprites" / f"{planet}.png")
-
-# Asteroid spritesheet
-asteroid_dir = cur_dir.parent / "static" / "sprites" / "asteroid sprites"
-if asteroid_dir.exists():
-    # Get all PNG files in the asteroid directory
-    asteroid_files = sorted([f for f in os.listdir(asteroid_dir) if f.endswith(".png")])
-
-    if asteroid_files:
-        # Load first asteroid to get dimensions
-        first_asteroid = Image.open(asteroid_dir / asteroid_files[0])
-        width, height = first_asteroid.size
-
-        # Calculate grid layout (try to make roughly square)
-        num_asteroids = len(asteroid_files)
-        cols = int(num_asteroids**0.5) + 1
-        rows = (num_asteroids + cols - 1) // cols
-
-        print(f"Creating asteroid spritesheet: {cols}x{rows} grid for {num_asteroids} asteroids")
-
-        # Create the spritesheet
-        spritesheet = Image.new("RGBA", (width * cols, height * rows), (0, 0, 0, 0))
-
-        collision_radii = []
-        # Paste each asteroid
-        for i, filename in enumerate(asteroid_files):
-            asteroid = Image.open(asteroid_dir / filename)
-            pixel_alpha_values = np.array(asteroid)[:, :, 3]
-            non_transparent_count = np.sum(pixel_alpha_values > 0)
-            collision_radii.append(int(np.sqrt(non_transparent_count / np.pi)))
-
-            # Calculate position in grid
-            col = i % cols
-            row = i // cols
-            x = col * width
-            y = row * height
-
-            spritesheet.paste(asteroid, (x, y))
-            print(f"Added {filename} at position ({col}, {row})")
-
-        # Save the spritesheet
-        output_path = cur_dir.parent / "static" / "sprites" / "asteroids.png"
-        spritesheet.save(output_path)
-        print(f"Asteroid spritesheet saved to: {output_path}")
-        print(f"Grid dimensions: {cols} columns x {rows} rows")
-        print(f"Each sprite: {width}x{height} pixels")
-
-        print("Collision radii:")
-        print(collision_radii)
+    return [planet_dir / f"sprite_{fr}.png" for fr in range(1, PLANET_FRAMES + 1)]
+
+
+def asteroid_paths() -> list[Path]:
+    """Paths of the asteroid sprites followed by the recycle items sheet."""
+    # recycle_XX.png are the debug copies process_recycle_sprites.py saves of the items it cuts out, not inputs
+    asteroid_files = sorted(asteroid_dir.glob("*.png"))
+    return [path for path in asteroid_files if not path.name.startswith("recycle_")] + [asteroid_dir / RECYCLE_SHEET]
+
+
+def font_path() -> Path | None:
+    """Path of the font to bake into the font atlas, or None if none of FONT_FILES exist."""
+    return next((path for path in FONT_FILES if path.exists()), None)
+
+
+def build_font_sheet(path: Path) -> str:
+    """Rasterize every glyph of a monospace font at each of FONT_SIZES and pack them into an atlas.
+
+    Glyphs are drawn without anti-aliasing, so they come out as crisp pixels like the rest of our sprites. Every glyph
+    starts out as a cell of the font's advance plus GLYPH_MARGIN on each side, with the baseline at the font's ascent,
+    and the frame offsets in the manifest are relative to that cell.
+    """
+    sprites = []
+    sizes = {}
+    for size in FONT_SIZES:
+        font = ImageFont.truetype(str(path), size)
+        ascent, descent = font.getmetrics()
+        advance = font.getlength("M")
+        sizes[str(size)] = {"first": len(sprites), "advance": advance, "ascent": ascent, "descent": descent}
+
+        cell = (math.ceil(advance) + 2 * GLYPH_MARGIN, ascent + descent + 2 * GLYPH_MARGIN)
+        for char in FONT_CHARS:
+            glyph = Image.new("RGBA", cell, (255, 255, 255, 0))
+            draw = ImageDraw.Draw(glyph)
+            draw.fontmode = "1"
+            draw.text((GLYPH_MARGIN, GLYPH_MARGIN + ascent), char, font=font, fill="white", anchor="ls")
+            sprites.append(glyph)
+
+    atlas, frames = pack_atlas(sprites)
+    save_atomic(atlas, sprites_dir / "font.png")
+    manifest = {"chars": FONT_CHARS, "margin": GLYPH_MARGIN, "sizes": sizes, "frames": frames}
+    write_atomic(sprites_dir / "font.json", json.dumps(manifest, separators=(",", ":")))
+    glyphs = f"{len(FONT_CHARS)} glyphs at {len(FONT_SIZES)} sizes from {path.name}"
+    return f"font.png: {atlas.width}x{atlas.height} atlas, {glyphs}"
+
+
+def build_planet_sheet(planet: str) -> str:
+    """Paste the frames of a planet side by side into a single strip."""
+    frames = [Image.open(path) for path in planet_frame_paths(planet)]
+    width, height = frames[0].size
+    spritesheet = Image.new("RGBA", (width * len(frames), height), (0, 0, 0, 0))
+    for fr, frame in enumerate(frames):
+        spritesheet.paste(frame, (width * fr, 0))
+
+    save_atomic(spritesheet, sprites_dir / f"{planet}.png")
+    return f"{planet}.png: {len(frames)} frames of {width}x{height}"
+
+
+def build_asteroid_sheet() -> str:
+    """Pack the asteroid sprites followed by the recycle items into a trimmed atlas, along with its manifest."""
+    asteroid_files = asteroid_paths()[:-1]
+    sprites = [Image.open(path) for path in asteroid_files] + extract_recycle_sprites()
+    cell = (ASTEROID_CELL_SIZE, ASTEROID_CELL_SIZE)
+    sprites = [sprite if sprite.size == cell else resize_with_padding(sprite, cell) for sprite in sprites]
+
+    collision_radii, bboxes = sprite_stats(sprites)
+    atlas, frames = pack_atlas(sprites, bboxes)
+    save_atomic(atlas, sprites_dir / "asteroids.png")
+    manifest = {"cell_size": ASTEROID_CELL_SIZE, "frames": frames}
+    write_atomic(sprites_dir / "asteroids.json", json.dumps(manifest, separators=(",", ":")))
+
+    # collision_radii are the "magic numbers" for ASTEROID_RADII in static/scripts/asteroid.py
+    num_sprites = len(sprites)
+    return (
+        f"asteroids.png: {atlas.width}x{atlas.height} atlas, {len(asteroid_files)} asteroids + "
+        f"{num_sprites - len(asteroid_files)} recycle items\nCollision radii:\n{collision_radii}"
+    )
+
+
+def build_lods(name: str) -> str:
+    """Write halved mip levels of a sheet until its frames would drop below MIN_LOD_FRAME_SIZE.
+
+    Planet strips are scaled frame by frame so neighbouring frames don't bleed into each other, the asteroid atlas is
+    scaled as a whole since atlas.py leaves enough padding between its sprites. Planet frames are picked nearest
+    neighbour, smoother filters mix new colours into the pixel art and the levels would compress worse than the full
+    sheet.
+    """
+    sheet = Image.open(sprites_dir / f"{name}.png").convert("RGBA")
+    frame_size = ASTEROID_CELL_SIZE if name == "asteroids" else sheet.height
+
+    for stale in sprites_dir.glob(f"{name}_lod*.png"):
+        stale.unlink()
+
+    level = 1
+    while frame_size >> level >= MIN_LOD_FRAME_SIZE:
+        if name == "asteroids":
+            lod = sheet.reduce(2**level)
+        else:
+            lod_frame_size = frame_size >> level
+            lod = Image.new("RGBA", (lod_frame_size * (sheet.width // frame_size), lod_frame_size), (0, 0, 0, 0))
+            for i in range(sheet.width // frame_size):
+                frame = sheet.crop((i * frame_size, 0, (i + 1) * frame_size, frame_size))
+                frame = frame.resize((lod_frame_size, lod_frame_size), Image.Resampling.NEAREST)
+                lod.paste(frame, (i * lod_frame_size, 0))
+        save_atomic(lod, sprites_dir / f"{name}_lod{level}.png")
+        level += 1
+
+    return f"{name}: {level - 1} mip levels"
+
+
+def psnr(original: Image.Image, encoded: Image.Image) -> float:
+    """Peak signal to noise ratio of an encoding, in dB, ignoring the colour of fully transparent pixels."""
+    a = np.asarray(original.convert("RGBA"), dtype=np.float64)
+    b = np.asarray(encoded.convert("RGBA"), dtype=np.float64)
+    # premultiply, so transparent pixels count the same whatever colour the encoder gave them
+    a[..., :3] *= a[..., 3:] / 255
+    b[..., :3] *= b[..., 3:] / 255
+    mse = np.mean((a - b) ** 2)
+    return float("inf") if mse == 0 else float(10 * np.log10(255**2 / mse))
+
+
+def build_variants(name: str) -> str:
+    """Encode an image as lossless WebP, AVIF and palette PNG next to the original in the variants directory."""
+    source = sprites_dir / f"{name}.png"
+    image = Image.open(source).convert("RGBA")
+    original_size = source.stat().st_size
+
+    encodings = {
+        ".webp": lambda buffer: image.save(buffer, format="WEBP", lossless=True, method=6),
+        ".png": lambda buffer: image.quantize(256, method=Image.Quantize.FASTOCTREE).save(
+            buffer, format="PNG", optimize=True
+        ),
+    }
+    if features.check("avif"):
+        encodings[".avif"] = lambda buffer: image.save(buffer, format="AVIF", quality=AVIF_QUALITY)
+
+    report = [f"{name}.png: {original_size / 1024:.0f} KB"]
+    kept_sizes = {}
+    for suffix, encode in encodings.items():
+        path = variants_dir / f"{name}{suffix}"
+        buffer = BytesIO()
+        encode(buffer)
+        data = buffer.getvalue()
+        quality = psnr(image, Image.open(BytesIO(data)))
+        # browsers that take AVIF all take WebP as well, so it's only worth keeping when it beats that too
+        limit = min(original_size, kept_sizes.get(".webp", original_size)) if suffix == ".avif" else original_size
+        # every browser gets the PNG variant in place of the original, so it must not lose anything
+        min_quality = math.inf if suffix == ".png" else MIN_VARIANT_PSNR
+        if len(data) < limit and quality >= min_quality:
+            write_atomic(path, data)
+            kept_sizes[suffix] = len(data)
+            status = ""
+        else:
+            path.unlink(missing_ok=True)
+            status = ", skipped"
+        report.append(f"{suffix[1:]} {len(data) / 1024:.0f} KB ({quality:.1f} dB{status})")
+    return ", ".join(report)
+
+
+def sheet_jobs() -> dict[str, tuple[list[Path], Callable[..., str], tuple]]:
+    """Every sheet we know how to build, as its input files, its build function and that function's arguments."""
+    jobs = {}
+    for planet in PLANETS:
+        if (cur_dir / f"{planet} sprites").exists():
+            jobs[planet] = (planet_frame_paths(planet), build_planet_sheet, (planet,))
+    if asteroid_dir.exists():
+        jobs["asteroids"] = (asteroid_paths(), build_asteroid_sheet, ())
+    font = font_path()
+    if font:
+        jobs["font"] = ([font], build_font_sheet, (font,))
+    return jobs
+
+
+def lod_jobs() -> dict[str, tuple[list[Path], Callable[..., str], tuple]]:
+    """List the mip levels of every sheet in the same form as sheet_jobs(), with the built sheet as their input."""
+    return {
+        f"{name}_lods": ([sprites_dir / f"{name}.png"], build_lods, (name,))
+        for name in [*PLANETS, "asteroids"]
+        if (sprites_dir / f"{name}.png").exists()
+    }
+
+
+def variant_jobs(names: list[str] | None = None) -> dict[str, tuple[list[Path], Callable[..., str], tuple]]:
+    """List the encoded variants of every image in the sprites directory, or of the given sheets and their mips."""
+    variants_dir.mkdir(exist_ok=True)
+    return {
+        f"{path.stem}_variants": ([path], build_variants, (path.stem,))
+        for path in sprites_dir.glob("*.png")
+        if not names or path.stem.split("_lod")[0] in names
+    }
+
+
+def build_sheets(names: list[str] | None = None, *, force: bool = False, workers: int | None = None) -> None:
+    """Rebuild the sheets whose inputs changed since they were last built, followed by their mip levels and variants.
+
+    Arguments:
+        names: Only consider these sheets, defaults to all of them.
+        force: Rebuild the sheets even if their inputs didn't change.
+        workers: Number of processes to build with, defaults to the number of CPUs.
+
+    """
+    jobs = sheet_jobs()
+    unknown = set(names or []) - jobs.keys() - {name.removesuffix("_lods") for name in lod_jobs()}
+    if unknown:
+        print(f"No inputs found for: {', '.join(sorted(unknown))}")
+
+    state = json.loads(BUILD_STATE_FILE.read_text()) if BUILD_STATE_FILE.exists() else {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        run_jobs(executor, jobs, state, names, force=force)
+        # the mip levels are made from the sheets, so their hashes can only be checked once those are built
+        run_jobs(executor, lod_jobs(), state, names and [f"{name}_lods" for name in names], force=force)
+        run_jobs(executor, variant_jobs(names), state, None, force=force)
+
+
+def run_jobs(
+    executor: ProcessPoolExecutor,
+    jobs: dict[str, tuple[list[Path], Callable[..., str], tuple]],
+    state: dict[str, str],
+    names: list[str] | None,
+    *,
+    force: bool,
+) -> None:
+    """Run the jobs whose inputs changed in parallel, recording their input hashes in the build state."""
+    pending = {}
+    for name, (inputs, build, args) in jobs.items():
+        if names and name not in names:
+            continue
+        input_hash = hash_inputs(inputs)
+        if not force and state.get(name) == input_hash:
+            print(f"{name}: unchanged, skipping")
+            continue
+        pending[name] = (input_hash, build, args)
+
+    futures = {executor.submit(build, *args): name for name, (_, build, args) in pending.items()}
+    for future in as_completed(futures):
+        name = futures[future]
+        print(future.result())
+        # record each sheet as soon as it's done, so a failure elsewhere doesn't force rebuilding it
+        state[name] = pending[name][0]
+        BUILD_STATE_FILE.write_text(json.dumps(state, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the planet and asteroid spritesheets")
+    parser.add_argument(
+        "sheets", nargs="*", help=f"Sheets to build (default: all of {[*PLANETS, 'asteroids', 'font']})"
+    )
+    parser.add_argument("--force", action="store_true", help="Rebuild sheets even if their inputs are unchanged")
+    parser.add_argument("--jobs", type=int, default=None, help="Number of worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    build_sheets(args.sheets, force=args.force, workers=args.jobs)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Report how much memory the sprite sheets take once the browser decodes them, and check it against a budget.
+
+A sheet decodes to width x height x 4 bytes of RGBA no matter how well its PNG compresses, so a 50 frame planet strip
+costs the same whether it's 50 KB or 500 KB on disk. For every sheet in static/sprites this prints its dimensions,
+frame count and decoded size, and flags:
+-   sheets wider or taller than the max texture size, which some GPUs refuse to upload or silently downscale
+-   the total decoded size of the sheets the page loads up front going over the budget
+-   orphaned sheets that none of the game scripts, the template or planets.json refer to
+
+The numbers are also written to static/texture_budget.json, which app.py hands to the game so it can warn in the
+console when it loads more than the budget. Exits with status 1 when anything was flagged.
+"""
+
+import argparse
+import json
+import logging
+import re
+import struct
+import sys
+from pathlib import Path
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
+
+WORKING_DIR = Path(__file__).parent.parent
+SPRITES_DIR = WORKING_DIR / "static" / "sprites"
+OUTPUT_FILE = WORKING_DIR / "static" / "texture_budget.json"
+# where sheets can be referred to from, by their name in quotes or their file name
+REFERENCE_SOURCES = [
+    *(WORKING_DIR / "static" / "scripts").glob("*.py"),
+    *(WORKING_DIR / "templates").glob("*.html"),
+    WORKING_DIR / "horizons_data" / "planets.json",
+]
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+LOD_PATTERN = re.compile(r"(?P<sheet>.+)_lod\d+$")
+MIB = 1024 * 1024
+
+
+def read_png_size(path: Path) -> tuple[int, int]:
+    """Read the width and height of a PNG from its IHDR chunk, without decoding the image."""
+    with path.open("rb") as f:
+        header = f.read(24)
+    # signature, then the IHDR chunk which always comes first: length, type, width, height
+    if len(header) < 24 or header[:8] != PNG_SIGNATURE or header[12:16] != b"IHDR":  # noqa: PLR2004
+        msg = f"{path} is not a PNG file"
+        raise ValueError(msg)
+    width, height = struct.unpack(">II", header[16:24])
+    return width, height
+
+
+def count_frames(path: Path, width: int, height: int) -> int:
+    """Count the frames of a sheet, from its atlas manifest if it has one, else as square frames side by side."""
+    match = LOD_PATTERN.match(path.stem)
+    manifest_path = path.with_stem(match["sheet"] if match else path.stem).with_suffix(".json")
+    if manifest_path.exists():
+        return len(json.loads(manifest_path.read_text(encoding="utf-8"))["frames"])
+    if height and width % height == 0:
+        return width // height
+    return 1
+
+
+def find_orphans(names: list[str]) -> list[str]:
+    """Find the sheets that aren't referred to anywhere, counting mip levels as referred to through their sheet."""
+    sources = "\n".join(path.read_text(encoding="utf-8") for path in REFERENCE_SOURCES if path.exists())
+    orphans = []
+    for name in names:
+        match = LOD_PATTERN.match(name)
+        sheet = match["sheet"] if match else name
+        quoted = (f'"{sheet}"', f"'{sheet}'", f"{sheet}.png")
+        if not any(reference in sources for reference in quoted):
+            orphans.append(name)
+    return orphans
+
+
+def lazy_sheets(names: list[str]) -> list[str]:
+    """Find the sheets the page doesn't preload.
+
+    A sheet with mip levels only has its smallest level preloaded, the full sheet and the bigger levels are only
+    downloaded once the game draws it at a size that needs them.
+    """
+    levels: dict[str, list[str]] = {}
+    for name in names:
+        match = LOD_PATTERN.match(name)
+        if match:
+            levels.setdefault(match["sheet"], []).append(name)
+
+    lazy = []
+    for sheet, sheet_levels in levels.items():
+        smallest = max(sheet_levels, key=lambda name: int(name.rpartition("_lod")[2]))
+        lazy += [sheet, *(name for name in sheet_levels if name != smallest)]
+    return [name for name in lazy if name in names]
+
+
+def build_report(sprites_dir: Path) -> dict:
+    """Collect the dimensions, frame counts and decoded sizes of every sheet in the directory."""
+    sheets = {}
+    for path in sorted(sprites_dir.glob("*.png")):
+        width, height = read_png_size(path)
+        sheets[path.stem] = {
+            "width": width,
+            "height": height,
+            "frames": count_frames(path, width, height),
+            "decoded_bytes": width * height * 4,
+        }
+    return sheets
+
+
+def main() -> int:
+    """Print the report, write the manifest and return the exit status."""
+    parser = argparse.ArgumentParser(description="Report and check the decoded memory used by the sprite sheets")
+    parser.add_argument("--budget-mib", type=float, default=64, help="Budget for the preloaded sheets (default: 64)")
+    parser.add_argument(
+        "--max-texture-size", type=int, default=8192, help="Largest width or height of a sheet (default: 8192)"
+    )
+    parser.add_argument("--output", type=Path, default=OUTPUT_FILE, help="Where to write the manifest")
+    args = parser.parse_args()
+
+    sheets = build_report(SPRITES_DIR)
+    orphans = find_orphans(list(sheets))
+    max_size = args.max_texture_size
+    oversized = [name for name, sheet in sheets.items() if max(sheet["width"], sheet["height"]) > max_size]
+
+    print(f"{'sheet':<24} {'size':>13} {'frames':>6} {'decoded':>10}")
+    for name, sheet in sorted(sheets.items(), key=lambda item: item[1]["decoded_bytes"], reverse=True):
+        flags = [flag for flag, names in (("OVERSIZED", oversized), ("ORPHANED", orphans)) if name in names]
+        size = f"{sheet['width']}x{sheet['height']}"
+        decoded = f"{sheet['decoded_bytes'] / MIB:.2f} MiB"
+        print(f"{name:<24} {size:>13} {sheet['frames']:>6} {decoded:>10}  {' '.join(flags)}")
+
+    lazy = sum(sheets[name]["decoded_bytes"] for name in lazy_sheets(list(sheets)))
+    preloaded = sum(sheet["decoded_bytes"] for sheet in sheets.values()) - lazy
+    budget = int(args.budget_mib * MIB)
+    print(f"\nPreloaded: {preloaded / MIB:.2f} MiB of a {args.budget_mib:g} MiB budget")
+    print(f"On demand: {lazy / MIB:.2f} MiB more at most")
+
+    manifest = {"budget_bytes": budget, "max_texture_size": args.max_texture_size, "sheets": sheets}
+    args.output.write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+    log.info("Wrote %s", args.output)
+
+    flagged = False
+    if preloaded > budget:
+        log.warning("Preloaded sheets exceed the budget by %.2f MiB", (preloaded - budget) / MIB)
+        flagged = True
+    if oversized:
+        log.warning("Sheets over the max texture size of %d: %s", args.max_texture_size, ", ".join(oversized))
+        flagged = True
+    if orphans:
+        log.warning("Sheets nothing refers to: %s", ", ".join(orphans))
+        flagged = True
+    return 1 if flagged else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())